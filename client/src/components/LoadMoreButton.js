@@ -0,0 +1,22 @@
+import React from 'react';
+
+const LoadMoreButton = ({ onClick, loading }) => {
+  return (
+    <div className="text-center my-4">
+      <button className="btn btn-outline-primary" onClick={onClick} disabled={loading}>
+        {loading ? (
+          <>
+            <span className="spinner-border spinner-border-sm me-2" role="status" aria-hidden="true"></span>
+            Loading...
+          </>
+        ) : (
+          <>
+            <i className="bi bi-chevron-down me-1"></i> Load more
+          </>
+        )}
+      </button>
+    </div>
+  );
+};
+
+export default LoadMoreButton;
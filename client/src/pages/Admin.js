@@ -2,6 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import axios from 'axios';
+import { fetchPage } from '../services/api';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const API_URL = 'http://localhost:8000/api/v1';
 
@@ -14,6 +16,9 @@ const Admin = () => {
   const [borrows, setBorrows] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  // Cursor for the next page of the active tab's list
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // New book form state
   const [newBook, setNewBook] = useState({
@@ -38,31 +43,39 @@ const Admin = () => {
     }
   }, [currentUser, navigate, activeTab]);
   
-  const fetchData = async () => {
-    setLoading(true);
+  // Loads the first page of the active tab, or appends the page after `after`
+  const fetchData = async (after = null) => {
+    const setBusy = after ? setLoadingMore : setLoading;
+    setBusy(true);
     setError(null);
+    if (!after) {
+      setNextCursor(null);
+    }
     
     try {
       const token = localStorage.getItem('token');
       const headers = {
         Authorization: `Bearer ${token}`
       };
+      const addPage = (items) => (after ? (loaded) => [...loaded, ...items] : items);
       
+      let response;
       if (activeTab === 'books') {
-        const response = await axios.get(`${API_URL}/admin/books`, { headers });
-        setBooks(response.data);
+        response = await fetchPage(axios, `${API_URL}/admin/books`, { headers, after });
+        setBooks(addPage(response.data));
       } else if (activeTab === 'users') {
-        const response = await axios.get(`${API_URL}/admin/users`, { headers });
-        setUsers(response.data);
+        response = await fetchPage(axios, `${API_URL}/admin/users`, { headers, after });
+        setUsers(addPage(response.data));
       } else if (activeTab === 'borrows') {
-        const response = await axios.get(`${API_URL}/admin/borrows`, { headers });
-        setBorrows(response.data);
+        response = await fetchPage(axios, `${API_URL}/admin/borrows`, { headers, after });
+        setBorrows(addPage(response.data));
       }
+      setNextCursor(response ? response.nextCursor : null);
     } catch (error) {
       console.error('Error fetching data:', error);
       setError('Failed to load data. Please try again.');
     } finally {
-      setLoading(false);
+      setBusy(false);
     }
   };
   
@@ -353,6 +366,7 @@ const Admin = () => {
                   </tbody>
                 </table>
               </div>
+              {nextCursor && <LoadMoreButton onClick={() => fetchData(nextCursor)} loading={loadingMore} />}
               
               {/* Edit Book Modal */}
               {editingBook && (
@@ -488,6 +502,7 @@ const Admin = () => {
                   </tbody>
                 </table>
               </div>
+              {nextCursor && <LoadMoreButton onClick={() => fetchData(nextCursor)} loading={loadingMore} />}
             </div>
           )}
           
@@ -532,6 +547,7 @@ const Admin = () => {
                   </tbody>
                 </table>
               </div>
+              {nextCursor && <LoadMoreButton onClick={() => fetchData(nextCursor)} loading={loadingMore} />}
             </div>
           )}
         </>
@@ -2,18 +2,22 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { borrowService } from '../services/api';
 import BorrowTable from '../components/BorrowTable';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const BorrowedBooks = () => {
   const [borrowRecords, setBorrowRecords] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [hasActiveBooks, setHasActiveBooks] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchBorrowedBooks = async () => {
     setLoading(true);
     try {
       const response = await borrowService.getBorrowedBooks();
       setBorrowRecords(response.data);
+      setNextCursor(response.nextCursor);
       
       // Check if user has any active (non-returned) books
       const activeBooks = response.data.some(record => !record.is_returned);
@@ -28,6 +32,23 @@ const BorrowedBooks = () => {
     }
   };
 
+  const loadMoreBorrowedBooks = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await borrowService.getBorrowedBooks(nextCursor);
+      setBorrowRecords((loaded) => [...loaded, ...response.data]);
+      setNextCursor(response.nextCursor);
+      if (response.data.some(record => !record.is_returned)) {
+        setHasActiveBooks(true);
+      }
+    } catch (error) {
+      console.error('Error fetching more borrowed books:', error);
+      setError('Failed to load more borrowed books. Please try again later.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchBorrowedBooks();
   }, []);
@@ -56,7 +77,10 @@ const BorrowedBooks = () => {
               {error}
             </div>
           ) : (
-            <BorrowTable borrowRecords={borrowRecords} onReturn={handleReturn} />
+            <>
+              <BorrowTable borrowRecords={borrowRecords} onReturn={handleReturn} />
+              {nextCursor && <LoadMoreButton onClick={loadMoreBorrowedBooks} loading={loadingMore} />}
+            </>
           )}
           
           {borrowRecords.length === 0 && !loading && !error && (
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { bookService } from '../services/api';
 import BookList from '../components/BookList';
+import LoadMoreButton from '../components/LoadMoreButton';
 
 const Search = () => {
   const [books, setBooks] = useState([]);
@@ -8,12 +9,18 @@ const Search = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [typingTimeout, setTypingTimeout] = useState(null);
+  // Cursor for the next page of the query whose results are shown
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadedQuery, setLoadedQuery] = useState('');
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchBooks = async (searchQuery = '') => {
     setLoading(true);
     try {
       const response = await bookService.getAllBooks(searchQuery);
       setBooks(response.data);
+      setNextCursor(response.nextCursor);
+      setLoadedQuery(searchQuery);
       setError(null);
     } catch (error) {
       console.error('Error fetching books:', error);
@@ -23,6 +30,20 @@ const Search = () => {
     }
   };
 
+  const loadMoreBooks = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await bookService.getAllBooks(loadedQuery, nextCursor);
+      setBooks((loaded) => [...loaded, ...response.data]);
+      setNextCursor(response.nextCursor);
+    } catch (error) {
+      console.error('Error fetching more books:', error);
+      setError('Failed to load more books. Please try again later.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchBooks();
   }, []);
@@ -92,7 +113,10 @@ const Search = () => {
           {error}
         </div>
       ) : (
-        <BookList books={books} onBorrow={handleBorrow} />
+        <>
+          <BookList books={books} onBorrow={handleBorrow} />
+          {nextCursor && <LoadMoreButton onClick={loadMoreBooks} loading={loadingMore} />}
+        </>
       )}
     </div>
   );
@@ -22,6 +22,17 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// List endpoints return one page at a time, with the cursor for the next page
+// in the X-Next-Cursor header (absent on the last page). Pass it back as
+// `after` to load the following page.
+export const fetchPage = async (client, url, { after, ...config } = {}) => {
+  const response = await client.get(url, {
+    ...config,
+    params: { ...config.params, ...(after ? { after } : {}) },
+  });
+  return { data: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 // Authentication services
 export const authService = {
   login: async (username, password) => {
@@ -57,8 +68,8 @@ export const authService = {
 
 // Book services
 export const bookService = {
-  getAllBooks: async (query = '') => {
-    return await api.get(`/books?query=${query}`);
+  getAllBooks: async (query = '', after = null) => {
+    return await fetchPage(api, '/books/', { params: query ? { query } : {}, after });
   },
   
   getBook: async (id) => {
@@ -72,8 +83,8 @@ export const bookService = {
 
 // Borrow services
 export const borrowService = {
-  getBorrowedBooks: async () => {
-    return await api.get('/borrow');
+  getBorrowedBooks: async (after = null) => {
+    return await fetchPage(api, '/borrow/', { after });
   },
   
   borrowBook: async (bookId) => {
@@ -0,0 +1,90 @@
+"""Initial schema: users, books, borrow records and the search index
+
+Databases created before migrations existed (by create_all at import time)
+already have some of these tables; they are adopted as they are, adding the
+is_admin column if it is missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from app.db.search import create_search_index
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if context.is_offline_mode():
+        # Generated SQL (`alembic upgrade --sql`) is for an empty database
+        inspector, existing = None, set()
+    else:
+        inspector = sa.inspect(bind)
+        existing = set(inspector.get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("username", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("hashed_password", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("is_admin", sa.Boolean()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    elif "is_admin" not in [column["name"] for column in inspector.get_columns("users")]:
+        op.add_column("users", sa.Column("is_admin", sa.Boolean(), server_default=sa.false()))
+
+    if "books" not in existing:
+        op.create_table(
+            "books",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String()),
+            sa.Column("author", sa.String()),
+            sa.Column("genre", sa.String()),
+            sa.Column("available_copies", sa.Integer()),
+            sa.Column("total_copies", sa.Integer()),
+        )
+        op.create_index("ix_books_id", "books", ["id"])
+        op.create_index("ix_books_title", "books", ["title"])
+        op.create_index("ix_books_author", "books", ["author"])
+        op.create_index("ix_books_genre", "books", ["genre"])
+
+    if "borrow_records" not in existing:
+        op.create_table(
+            "borrow_records",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("book_id", sa.Integer(), sa.ForeignKey("books.id")),
+            sa.Column("borrow_date", sa.DateTime()),
+            sa.Column("return_date", sa.DateTime(), nullable=True),
+            sa.Column("is_returned", sa.Boolean()),
+        )
+        op.create_index("ix_borrow_records_id", "borrow_records", ["id"])
+
+    create_search_index(bind)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        for trigger in ("books_fts_ai", "books_fts_ad", "books_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
+    op.drop_table("borrow_records")
+    op.drop_table("books")
+    op.drop_table("users")
@@ -0,0 +1,38 @@
+"""Composite and partial indexes for the hot borrow_records queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_borrow_records_user_history",
+        "borrow_records",
+        ["user_id", "is_returned", sa.text("borrow_date DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_borrow_records_active",
+        "borrow_records",
+        ["book_id", "user_id"],
+        sqlite_where=sa.text("is_returned = 0"),
+        postgresql_where=sa.text("is_returned = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_records_active", table_name="borrow_records")
+    op.drop_index("ix_borrow_records_user_history", table_name="borrow_records")
@@ -0,0 +1,57 @@
+"""Persisted due dates and per-book loan periods
+
+Existing loans are backfilled with the 14-day period the app used before
+due dates were stored.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("books", sa.Column("loan_period_days", sa.Integer(), nullable=True))
+    op.add_column("borrow_records", sa.Column("due_date", sa.DateTime(), nullable=True))
+
+    if op.get_bind().dialect.name == "sqlite":
+        # Same text format SQLAlchemy writes, so due dates compare as strings
+        backfill = "strftime('%Y-%m-%d %H:%M:%f000', borrow_date, '+14 days')"
+    else:
+        backfill = "borrow_date + interval '14 days'"
+    op.execute(f"UPDATE borrow_records SET due_date = {backfill} WHERE due_date IS NULL")
+
+    op.create_index(
+        "ix_borrow_records_due",
+        "borrow_records",
+        ["due_date", "user_id"],
+        sqlite_where=sa.text("is_returned = 0"),
+        postgresql_where=sa.text("is_returned = false"),
+    )
+    op.create_index(
+        "ix_borrow_records_due_by_user",
+        "borrow_records",
+        ["user_id", "due_date"],
+        sqlite_where=sa.text("is_returned = 0"),
+        postgresql_where=sa.text("is_returned = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_records_due_by_user", table_name="borrow_records")
+    op.drop_index("ix_borrow_records_due", table_name="borrow_records")
+    with op.batch_alter_table("borrow_records") as batch_op:
+        batch_op.drop_column("due_date")
+    with op.batch_alter_table("books") as batch_op:
+        batch_op.drop_column("loan_period_days")
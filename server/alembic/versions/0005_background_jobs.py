@@ -0,0 +1,59 @@
+"""Background job schedule, overdue flag and daily circulation rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "borrow_records",
+        sa.Column("is_overdue", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_index("ix_borrow_records_borrow_date", "borrow_records", ["borrow_date"])
+
+    op.create_table(
+        "scheduled_jobs",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("next_run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("last_started_at", sa.DateTime(), nullable=True),
+        sa.Column("last_finished_at", sa.DateTime(), nullable=True),
+        sa.Column("last_status", sa.String(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "daily_book_circulation",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("book_id", sa.Integer(), primary_key=True),
+        sa.Column("borrows", sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        "daily_genre_circulation",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("genre", sa.String(), primary_key=True),
+        sa.Column("borrows", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_genre_circulation")
+    op.drop_table("daily_book_circulation")
+    op.drop_table("scheduled_jobs")
+    op.drop_index("ix_borrow_records_borrow_date", table_name="borrow_records")
+    with op.batch_alter_table("borrow_records") as batch_op:
+        batch_op.drop_column("is_overdue")
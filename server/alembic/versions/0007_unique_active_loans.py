@@ -0,0 +1,43 @@
+"""One active loan per patron and book, enforced by the database
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The duplicate-borrow check is a plain SELECT, which two concurrent
+    # borrows can both pass under READ COMMITTED; the index makes one fail
+    op.drop_index("ix_borrow_records_active", table_name="borrow_records")
+    op.create_index(
+        "ix_borrow_records_active",
+        "borrow_records",
+        ["book_id", "user_id"],
+        unique=True,
+        sqlite_where=sa.text("is_returned = 0"),
+        postgresql_where=sa.text("is_returned = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_borrow_records_active", table_name="borrow_records")
+    op.create_index(
+        "ix_borrow_records_active",
+        "borrow_records",
+        ["book_id", "user_id"],
+        sqlite_where=sa.text("is_returned = 0"),
+        postgresql_where=sa.text("is_returned = false"),
+    )
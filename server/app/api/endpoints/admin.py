@@ -1,13 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from ...db.database import get_db
-from ...db.models import Book, User, BorrowRecord
-from ...schemas.book import Book as BookSchema, BookCreate
+from ...db.catalog import bump_catalog_version, catalog_cache
+from ...db.database import get_db, run_in_transaction
+from ...db.exporter import EXPORT_FORMATS, books_export_query, borrows_export_query, stream_rows
+from ...db.holds import lend_to_queue
+from ...db.importer import IMPORT_FORMATS, guess_format, import_books, read_rows
+from ...db.models import (
+    Book, BorrowRecord, DailyBookCirculation, DailyGenreCirculation, Hold, ScheduledJob, User
+)
+from ...schemas.analytics import BookBorrowCount, DailyBorrows, GenreUtilization, Utilization
+from ...schemas.book import Book as BookSchema, BookCreate, BookImportReport
 from ...schemas.user import User as UserSchema, UserCreate
-from ...schemas.borrow import BorrowRecordDetail
-from ...core.security import get_current_active_user, get_password_hash
+from ...schemas.borrow import BorrowRecordDetail, OverdueUser
+from ...schemas.job import ScheduledJob as ScheduledJobSchema
+from ...core.config import settings
+from ...core.security import get_current_active_user, get_password_hash_async, invalidate_principal, principal_cache
+from .auth import create_user, ensure_user_available
+from .borrow import borrow_rows
+from ..pagination import PageParams, paginate, page_response
 
 router = APIRouter()
 
@@ -23,11 +41,13 @@ async def get_current_admin_user(current_user: User = Depends(get_current_active
 # Admin book management endpoints
 @router.get("/books", response_model=List[BookSchema])
 def get_all_books(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    books = db.query(Book).all()
-    return books
+    items, next_cursor = paginate(db, select(*page.columns(Book, BookSchema)), [(Book.id, False)], page, projected=True)
+    return page_response(items, next_cursor, response, projected=True)
 
 @router.post("/books", response_model=BookSchema)
 def create_book(
@@ -40,13 +60,41 @@ def create_book(
         author=book.author,
         genre=book.genre,
         available_copies=book.available_copies,
-        total_copies=book.total_copies
+        total_copies=book.total_copies,
+        loan_period_days=book.loan_period_days
     )
-    db.add(db_book)
-    db.commit()
+
+    def create():
+        db.add(db_book)
+        bump_catalog_version(db)
+
+    run_in_transaction(db, create)
     db.refresh(db_book)
     return db_book
 
+@router.post("/books/import", response_model=BookImportReport)
+def import_books_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    fmt = format or guess_format(file.filename)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown import format. Use one of: {', '.join(IMPORT_FORMATS)}"
+        )
+
+    # The upload is parsed as it is read, one batch in memory at a time
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_books(db, read_rows(stream, fmt))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+    finally:
+        stream.detach()
+
 @router.put("/books/{book_id}", response_model=BookSchema)
 def update_book(
     book_id: int,
@@ -54,17 +102,29 @@ def update_book(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
-    if not db_book:
-        raise HTTPException(status_code=404, detail="Book not found")
+    def update():
+        db_book = db.query(Book).filter(Book.id == book_id).first()
+        if not db_book:
+            raise HTTPException(status_code=404, detail="Book not found")
+
+        added = book.available_copies - db_book.available_copies
+        db_book.title = book.title
+        db_book.author = book.author
+        db_book.genre = book.genre
+        db_book.available_copies = book.available_copies
+        db_book.total_copies = book.total_copies
+        # Forms that don't know about loan periods leave the override alone
+        if "loan_period_days" in book.model_fields_set:
+            db_book.loan_period_days = book.loan_period_days
 
-    db_book.title = book.title
-    db_book.author = book.author
-    db_book.genre = book.genre
-    db_book.available_copies = book.available_copies
-    db_book.total_copies = book.total_copies
+        # New copies go to patrons waiting for the book before the shelf
+        if added > 0:
+            db.flush()
+            db_book.available_copies -= lend_to_queue(db, book_id, added)
+        bump_catalog_version(db)
+        return db_book
 
-    db.commit()
+    db_book = run_in_transaction(db, update)
     db.refresh(db_book)
     return db_book
 
@@ -74,34 +134,41 @@ def delete_book(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    db_book = db.query(Book).filter(Book.id == book_id).first()
-    if not db_book:
-        raise HTTPException(status_code=404, detail="Book not found")
+    def delete():
+        db_book = db.query(Book).filter(Book.id == book_id).first()
+        if not db_book:
+            raise HTTPException(status_code=404, detail="Book not found")
 
-    # Check if book has active borrows
-    active_borrows = db.query(BorrowRecord).filter(
-        BorrowRecord.book_id == book_id,
-        BorrowRecord.is_returned == False
-    ).count()
+        # Check if book has active borrows
+        active_borrows = db.query(BorrowRecord).filter(
+            BorrowRecord.book_id == book_id,
+            BorrowRecord.is_returned == False
+        ).count()
 
-    if active_borrows > 0:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete book with active borrows"
-        )
+        if active_borrows > 0:
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot delete book with active borrows"
+            )
 
-    db.delete(db_book)
-    db.commit()
-    return db_book
+        # Holds reference the book, so the queue and its history go with it
+        db.query(Hold).filter(Hold.book_id == book_id).delete(synchronize_session=False)
+        db.delete(db_book)
+        bump_catalog_version(db)
+        return db_book
+
+    return run_in_transaction(db, delete)
 
 # Admin user management endpoints
 @router.get("/users", response_model=List[UserSchema])
 def get_all_users(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    users = db.query(User).all()
-    return users
+    items, next_cursor = paginate(db, select(*page.columns(User, UserSchema)), [(User.id, False)], page, projected=True)
+    return page_response(items, next_cursor, response, projected=True)
 
 @router.get("/users/{user_id}", response_model=UserSchema)
 def get_user(
@@ -120,53 +187,194 @@ def toggle_admin_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    def toggle():
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
 
-    # Toggle admin status
-    user.is_admin = not user.is_admin
+        # Toggle admin status
+        user.is_admin = not user.is_admin
+        return user
 
-    db.commit()
+    user = run_in_transaction(db, toggle)
     db.refresh(user)
+    invalidate_principal(user.username)
     return user
 
+@router.get("/cache/stats")
+def get_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    return {"auth": principal_cache.stats(), "catalog": catalog_cache.stats()}
+
+@router.get("/jobs", response_model=List[ScheduledJobSchema])
+def get_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    return db.scalars(select(ScheduledJob).order_by(ScheduledJob.name)).all()
+
 # Create admin user endpoint
 @router.post("/create-admin", response_model=UserSchema)
-def create_admin_user(
+async def create_admin_user(
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ):
-    # Check if username already exists
-    db_user = db.query(User).filter(User.username == user_data.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
-
-    # Check if email already exists
-    db_email = db.query(User).filter(User.email == user_data.email).first()
-    if db_email:
-        raise HTTPException(status_code=400, detail="Email already registered")
+    # Check that username and email are free
+    await run_in_threadpool(ensure_user_available, db, user_data)
 
     # Create new admin user
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password,
-        is_admin=True  # Set as admin
-    )
-
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
-    return db_user
+    hashed_password = await get_password_hash_async(user_data.password)
+    return await run_in_threadpool(create_user, db, user_data, hashed_password, True)
 
 # Admin borrow management endpoints
 @router.get("/borrows", response_model=List[BorrowRecordDetail])
 def get_all_borrows(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    items, next_cursor = paginate(db, borrow_rows(page), [(BorrowRecord.id, False)], page, projected=True)
+    return page_response(items, next_cursor, response, projected=True)
+
+# Overdue loans, read from the partial due-date index on active loans
+@router.get("/overdue", response_model=List[BorrowRecordDetail])
+def get_overdue_borrows(
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    borrows = db.query(BorrowRecord).all()
-    return borrows
+    overdue = borrow_rows(page).where(BorrowRecord.is_returned == False, BorrowRecord.due_date < datetime.utcnow())
+
+    # Longest overdue first, in index order
+    keys = [
+        (BorrowRecord.due_date, False),
+        (BorrowRecord.user_id, False),
+        (BorrowRecord.id, False),
+    ]
+    items, next_cursor = paginate(db, overdue, keys, page, projected=True)
+    return page_response(items, next_cursor, response, projected=True)
+
+@router.get("/overdue/users", response_model=List[OverdueUser])
+def get_overdue_users(
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    counts = (
+        select(
+            BorrowRecord.user_id,
+            func.count().label("overdue_count"),
+            func.min(BorrowRecord.due_date).label("oldest_due_date")
+        )
+        .where(BorrowRecord.is_returned == False, BorrowRecord.due_date < datetime.utcnow())
+        .group_by(BorrowRecord.user_id)
+        .subquery()
+    )
+    overdue_users = (
+        select(User.id.label("user_id"), User.username, counts.c.overdue_count, counts.c.oldest_due_date)
+        .join(counts, counts.c.user_id == User.id)
+        .order_by(counts.c.overdue_count.desc(), User.id)
+        .limit(min(limit, settings.MAX_PAGE_SIZE))
+    )
+    return db.execute(overdue_users).mappings().all()
+
+# Analytics. Stock figures aggregate the books table (active loans are the
+# copies not on the shelf); borrow counts come from the daily rollups kept by
+# the roll_up_circulation job, so neither grows with the borrow history.
+def utilization(row) -> dict:
+    stats = dict(row._mapping)
+    stats["active_loans"] = stats["total_copies"] - stats["available_copies"]
+    stats["utilization"] = stats["active_loans"] / stats["total_copies"] if stats["total_copies"] else 0.0
+    return stats
+
+stock_columns = (
+    func.count(Book.id).label("titles"),
+    func.coalesce(func.sum(Book.total_copies), 0).label("total_copies"),
+    func.coalesce(func.sum(Book.available_copies), 0).label("available_copies"),
+)
+
+@router.get("/analytics/utilization", response_model=Utilization)
+def get_utilization(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    return utilization(db.execute(select(*stock_columns)).one())
+
+@router.get("/analytics/genres", response_model=List[GenreUtilization])
+def get_genre_utilization(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    genres = select(Book.genre, *stock_columns).group_by(Book.genre)
+    stats = [utilization(row) for row in db.execute(genres)]
+    return sorted(stats, key=lambda genre: genre["active_loans"], reverse=True)
+
+@router.get("/analytics/most-borrowed", response_model=List[BookBorrowCount])
+def get_most_borrowed_books(
+    days: int = Query(30, ge=1, le=3660),
+    limit: int = Query(10, ge=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    counts = (
+        select(DailyBookCirculation.book_id, func.sum(DailyBookCirculation.borrows).label("borrows"))
+        .where(DailyBookCirculation.day >= since)
+        .group_by(DailyBookCirculation.book_id)
+        .subquery()
+    )
+    most_borrowed = (
+        select(Book.id.label("book_id"), Book.title, Book.author, counts.c.borrows)
+        .join(counts, counts.c.book_id == Book.id)
+        .order_by(counts.c.borrows.desc(), Book.id)
+        .limit(min(limit, settings.MAX_PAGE_SIZE))
+    )
+    return db.execute(most_borrowed).mappings().all()
+
+@router.get("/analytics/borrows-per-day", response_model=List[DailyBorrows])
+def get_borrows_per_day(
+    days: int = Query(30, ge=1, le=3660),
+    genre: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    per_day = (
+        select(DailyGenreCirculation.day, func.sum(DailyGenreCirculation.borrows).label("borrows"))
+        .where(DailyGenreCirculation.day >= since)
+        .group_by(DailyGenreCirculation.day)
+        .order_by(DailyGenreCirculation.day)
+    )
+    if genre is not None:
+        per_day = per_day.where(DailyGenreCirculation.genre == genre)
+    return db.execute(per_day).mappings().all()
+
+# Bulk exports, streamed straight from the database
+def export_response(query, fmt: str, name: str):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown export format. Use one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    return StreamingResponse(
+        stream_rows(query, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+@router.get("/export/books")
+def export_books(
+    format: str = "ndjson",
+    current_user: User = Depends(get_current_admin_user)
+):
+    return export_response(books_export_query(), format, "books")
+
+@router.get("/export/borrows")
+def export_borrows(
+    format: str = "ndjson",
+    borrowed_from: Optional[datetime] = None,
+    borrowed_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_admin_user)
+):
+    return export_response(borrows_export_query(borrowed_from, borrowed_to), format, "borrows")
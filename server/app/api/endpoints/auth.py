@@ -1,22 +1,26 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from ...db.database import get_db
+from ...db.database import get_db, run_in_transaction
 from ...db.models import User
 from ...schemas.user import UserCreate, User as UserSchema, Token
+from ...core.ratelimit import client_ip, login_ip_rate_limit, login_rate_limit, login_slots
 from ...core.security import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
 router = APIRouter()
 
-@router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+# Registration and login are async so that bcrypt can be awaited on the
+# password pool; their short DB steps run in the threadpool.
+
+def ensure_user_available(db: Session, user: UserCreate):
     db_user = db.query(User).filter(User.username == user.username).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
@@ -25,20 +29,33 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     if db_email:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: str, is_admin: bool = False):
     db_user = User(
         username=user.username,
         email=user.email,
-        hashed_password=hashed_password
+        hashed_password=hashed_password,
+        is_admin=is_admin
     )
-    db.add(db_user)
-    db.commit()
+    run_in_transaction(db, lambda: db.add(db_user))
     db.refresh(db_user)
     return db_user
 
+@router.post("/register", response_model=UserSchema)
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    await run_in_threadpool(ensure_user_available, db, user)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(create_user, db, user, hashed_password)
+
 @router.post("/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+):
+    # Every attempt costs a bcrypt hash: cap attempts per client, and shed
+    # logins beyond what this worker can verify promptly
+    await login_rate_limit.check(f"{client_ip(request)}:user:{form_data.username}")
+    await login_ip_rate_limit.check(client_ip(request))
+    with login_slots.slot():
+        user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,43 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from sqlalchemy import or_
 
-from ...db.database import get_db
+from ...db.database import get_async_db, get_db, run_in_transaction
 from ...db.models import Book, User
+from ...db.catalog import bump_catalog_version, catalog_cache, get_catalog_state
+from ...db.search import apply_search
+from ..http_cache import cache_headers, catalog_etag, is_not_modified, not_modified, pack_response, unpack_response
+from ..pagination import NEXT_CURSOR_HEADER, PageParams, paginate_async
 from ...schemas.book import Book as BookSchema, BookCreate, BookSearch
+from ...core.ratelimit import catalog_slots, search_rate_limit
 from ...core.security import get_current_active_user
 
 router = APIRouter()
 
 @router.get("/", response_model=List[BookSchema])
-def get_books(
+async def get_books(
+    request: Request,
     query: str = None,
-    db: Session = Depends(get_db),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    books = db.query(Book)
-    
-    if query:
-        books = books.filter(
-            or_(
-                Book.title.ilike(f"%{query}%"),
-                Book.author.ilike(f"%{query}%"),
-                Book.genre.ilike(f"%{query}%")
-            )
-        )
-    
-    return books.all()
+    view = (" ".join(query.lower().split()) if query else None, page.after, page.limit, page.fields)
+    # Searches count against the user's rate limit even when cached
+    if view[0]:
+        await search_rate_limit.check(f"user:{current_user.id}")
+    version, updated_at = await get_catalog_state(db)
+    headers = cache_headers(catalog_etag(version, *view), updated_at)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    # Popular pages are served from the cache as ready-made JSON bytes. The
+    # version in the key keeps pages from before a catalog change, or built
+    # while one committed, from being served once it has.
+    cache_key = f"books:{version}:{view!r}"
+    cached = await catalog_cache.get(cache_key)
+    if cached is not None:
+        headers, body = unpack_response(cached)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    books = select(*page.columns(Book, BookSchema))
+    keys = [(Book.id, False)]
+
+    if view[0]:
+        books, rank = apply_search(books, view[0], db.bind.dialect.name)
+        if rank is not None:
+            keys.insert(0, (rank, False))
+
+    # Pages the cache could not answer are capped per worker, shedding the
+    # excess before the database falls behind
+    with catalog_slots.slot():
+        items, next_cursor = await paginate_async(db, books, keys, page, projected=True)
+    if next_cursor:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    body = orjson.dumps(items)
+
+    await catalog_cache.set(cache_key, pack_response(headers, body))
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/{book_id}", response_model=BookSchema)
-def get_book(
+async def get_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    book = db.query(Book).filter(Book.id == book_id).first()
+    # A missing book is a 404 whatever validators the client sends
+    version, updated_at = await get_catalog_state(db)
+    book = await db.get(Book, book_id)
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+
+    headers = cache_headers(catalog_etag(version, book_id), updated_at)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    response.headers.update(headers)
     return book
 
 @router.post("/", response_model=BookSchema)
@@ -51,9 +93,14 @@ def create_book(
         author=book.author,
         genre=book.genre,
         available_copies=book.available_copies,
-        total_copies=book.total_copies
+        total_copies=book.total_copies,
+        loan_period_days=book.loan_period_days
     )
-    db.add(db_book)
-    db.commit()
+
+    def create():
+        db.add(db_book)
+        bump_catalog_version(db)
+
+    run_in_transaction(db, create)
     db.refresh(db_book)
     return db_book
@@ -1,25 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from collections import Counter
 from typing import List
 from datetime import datetime
 
-from ...db.database import get_db
-from ...db.models import BorrowRecord, Book, User
-from ...schemas.borrow import BorrowRecordCreate, BorrowRecord as BorrowRecordSchema, BorrowRecordDetail
+from ...db.catalog import bump_catalog_version
+from ...db.database import get_async_db, get_db, run_in_transaction
+from ...db.holds import close_own_hold, lend_to_next_in_queue
+from ...db.loans import due_date
+from ...db.models import HOLD_WAITING, BorrowRecord, Book, Hold, User
+from ...schemas.book import Book as BookSchema
+from ...schemas.borrow import (
+    BorrowBatch, BorrowBatchResult, BorrowRecordCreate, BorrowRecord as BorrowRecordSchema,
+    BorrowRecordDetail, ReturnBatch, ReturnBatchResult
+)
 from ...core.security import get_current_active_user
+from ..pagination import PageParams, paginate_async, page_response, schema_columns
 
 router = APIRouter()
 
+def borrow_rows(page: PageParams):
+    """Borrow record columns for a page, each with its book nested unless fields were picked"""
+    columns = page.columns(BorrowRecord, BorrowRecordSchema)
+    if page.fields:
+        return select(*columns)
+    # The book comes from the same SELECT rather than one query per row
+    return select(*columns, *schema_columns(Book, BookSchema, "book")).join(BorrowRecord.book)
+
 @router.get("/", response_model=List[BorrowRecordDetail])
-def get_borrowed_books(
+async def get_borrowed_books(
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    borrow_records = borrow_rows(page).where(BorrowRecord.user_id == current_user.id)
+
+    # Active loans first, most recent first within each group
+    keys = [
+        (BorrowRecord.is_returned, False),
+        (BorrowRecord.borrow_date, True),
+        (BorrowRecord.id, True),
+    ]
+    items, next_cursor = await paginate_async(db, borrow_records, keys, page, projected=True)
+    return page_response(items, next_cursor, response, projected=True)
+
+# Batch routes are declared before the single-item ones so that "batch" is not
+# read as an id
+@router.post("/borrow/batch", response_model=List[BorrowBatchResult])
+def borrow_books(
+    batch: BorrowBatch,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    borrow_records = db.query(BorrowRecord).filter(
-        BorrowRecord.user_id == current_user.id
-    ).order_by(BorrowRecord.is_returned, BorrowRecord.borrow_date.desc()).all()
+    def borrow():
+        errors = {}
+        wanted = list(dict.fromkeys(batch.book_ids))
+
+        active = db.scalars(
+            select(BorrowRecord.book_id).where(
+                BorrowRecord.user_id == current_user.id,
+                BorrowRecord.book_id.in_(wanted),
+                BorrowRecord.is_returned == False
+            )
+        ).all()
+        errors.update((book_id, "You already have a copy of this book borrowed") for book_id in active)
+        wanted = [book_id for book_id in wanted if book_id not in errors]
+
+        # One conditional decrement for the whole stack, as in borrow_book
+        taken = {
+            book_id: (genre, loan_period_days)
+            for book_id, genre, loan_period_days in db.execute(
+                update(Book)
+                .where(Book.id.in_(wanted), Book.available_copies > 0)
+                .values(available_copies=Book.available_copies - 1)
+                .returning(Book.id, Book.genre, Book.loan_period_days)
+                .execution_options(synchronize_session=False)
+            )
+        } if wanted else {}
 
-    return borrow_records
+        missing = [book_id for book_id in wanted if book_id not in taken]
+        if missing:
+            found = set(db.scalars(select(Book.id).where(Book.id.in_(missing))).all())
+            errors.update(
+                (book_id, "Book is not available for borrowing" if book_id in found else "Book not found")
+                for book_id in missing
+            )
+
+        records = {}
+        if taken:
+            now = datetime.utcnow()
+            records = {
+                book_id: BorrowRecord(
+                    user_id=current_user.id,
+                    book_id=book_id,
+                    borrow_date=now,
+                    due_date=due_date(now, *loan)
+                )
+                for book_id, loan in taken.items()
+            }
+            db.add_all(records.values())
+            bump_catalog_version(db)
+            db.flush()
+            for book_id, record in records.items():
+                close_own_hold(db, current_user.id, book_id, record.id)
+        return {book_id: record.id for book_id, record in records.items()}, errors
+
+    try:
+        borrow_ids, errors = run_in_transaction(db, borrow)
+    except IntegrityError:
+        # ix_borrow_records_active: a concurrent request lent one of these
+        # books to this patron after the check above. Running the batch again
+        # reports it against that book alone.
+        try:
+            borrow_ids, errors = run_in_transaction(db, borrow)
+        except IntegrityError:
+            raise HTTPException(status_code=400, detail="You already have a copy of this book borrowed")
+    records = {
+        record.id: record
+        for record in db.scalars(select(BorrowRecord).where(BorrowRecord.id.in_(borrow_ids.values())))
+    } if borrow_ids else {}
+
+    results, seen = [], set()
+    for book_id in batch.book_ids:
+        if book_id in seen:
+            results.append(BorrowBatchResult(book_id=book_id, error="Book is listed more than once"))
+            continue
+        seen.add(book_id)
+        if book_id in borrow_ids:
+            results.append(BorrowBatchResult(book_id=book_id, record=records[borrow_ids[book_id]]))
+        else:
+            results.append(BorrowBatchResult(book_id=book_id, error=errors[book_id]))
+    return results
+
+@router.post("/return/batch", response_model=List[ReturnBatchResult])
+def return_books(
+    batch: ReturnBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    def give_back():
+        wanted = list(dict.fromkeys(batch.borrow_ids))
+        returned = db.execute(
+            update(BorrowRecord)
+            .where(
+                BorrowRecord.id.in_(wanted),
+                BorrowRecord.user_id == current_user.id,
+                BorrowRecord.is_returned == False
+            )
+            .values(is_returned=True, return_date=datetime.utcnow())
+            .returning(BorrowRecord.id, BorrowRecord.book_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        returned_ids = {borrow_id for borrow_id, _ in returned}
+
+        errors = {}
+        missing = [borrow_id for borrow_id in wanted if borrow_id not in returned_ids]
+        if missing:
+            found = set(db.scalars(
+                select(BorrowRecord.id).where(
+                    BorrowRecord.id.in_(missing),
+                    BorrowRecord.user_id == current_user.id
+                )
+            ).all())
+            errors.update(
+                (borrow_id, "Book already returned" if borrow_id in found else "Borrow record not found")
+                for borrow_id in missing
+            )
+
+        if returned:
+            # Copies of books with a hold queue go to the patrons waiting for them
+            restock = Counter(book_id for _, book_id in returned)
+            queued = db.scalars(
+                select(Hold.book_id).distinct().where(
+                    Hold.book_id.in_(restock), Hold.status == HOLD_WAITING
+                )
+            ).all()
+            for book_id in queued:
+                while restock[book_id] and lend_to_next_in_queue(db, book_id):
+                    restock[book_id] -= 1
+
+            # The rest go back on the shelf: one restock per distinct book, sent
+            # as a single executemany on the table (the ORM would treat it as a
+            # bulk update by primary key)
+            restock = +restock
+            books = Book.__table__
+            if restock:
+                db.execute(
+                    update(books)
+                    .where(books.c.id == bindparam("book_id"))
+                    .values(available_copies=books.c.available_copies + bindparam("copies")),
+                    [{"book_id": book_id, "copies": copies} for book_id, copies in restock.items()]
+                )
+            bump_catalog_version(db)
+        return returned_ids, errors
+
+    returned_ids, errors = run_in_transaction(db, give_back)
+    records = {
+        record.id: record
+        for record in db.scalars(select(BorrowRecord).where(BorrowRecord.id.in_(returned_ids)))
+    } if returned_ids else {}
+
+    results, seen = [], set()
+    for borrow_id in batch.borrow_ids:
+        if borrow_id in seen:
+            results.append(ReturnBatchResult(borrow_id=borrow_id, error="Borrow record is listed more than once"))
+            continue
+        seen.add(borrow_id)
+        if borrow_id in records:
+            results.append(ReturnBatchResult(borrow_id=borrow_id, record=records[borrow_id]))
+        else:
+            results.append(ReturnBatchResult(borrow_id=borrow_id, error=errors[borrow_id]))
+    return results
 
 @router.post("/borrow/{book_id}", response_model=BorrowRecordSchema)
 def borrow_book(
@@ -27,38 +222,54 @@ def borrow_book(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if not book:
-        raise HTTPException(status_code=404, detail="Book not found")
-
-    if not book.is_available():
-        raise HTTPException(status_code=400, detail="Book is not available for borrowing")
-
-    # Check if user already has an active borrow for this book
-    existing_borrow = db.query(BorrowRecord).filter(
-        BorrowRecord.user_id == current_user.id,
-        BorrowRecord.book_id == book_id,
-        BorrowRecord.is_returned == False
-    ).first()
-
-    if existing_borrow:
-        raise HTTPException(
-            status_code=400,
-            detail="You already have a copy of this book borrowed"
-        )
+    def borrow():
+        # Check if user already has an active borrow for this book
+        existing_borrow = db.query(BorrowRecord.id).filter(
+            BorrowRecord.user_id == current_user.id,
+            BorrowRecord.book_id == book_id,
+            BorrowRecord.is_returned == False
+        ).first()
+
+        if existing_borrow:
+            raise HTTPException(
+                status_code=400,
+                detail="You already have a copy of this book borrowed"
+            )
 
-    borrow_record = BorrowRecord(
-        user_id=current_user.id,
-        book_id=book_id
-    )
+        # Take a copy only if one is left; the check and the decrement are a
+        # single statement, so concurrent borrows can never oversell
+        taken = db.execute(
+            update(Book)
+            .where(Book.id == book_id, Book.available_copies > 0)
+            .values(available_copies=Book.available_copies - 1)
+            .returning(Book.genre, Book.loan_period_days)
+            .execution_options(synchronize_session=False)
+        ).first()
 
-    book.available_copies -= 1
+        if not taken:
+            if db.query(Book.id).filter(Book.id == book_id).first() is None:
+                raise HTTPException(status_code=404, detail="Book not found")
+            raise HTTPException(status_code=400, detail="Book is not available for borrowing")
 
-    db.add(borrow_record)
-    db.commit()
-    db.refresh(borrow_record)
+        now = datetime.utcnow()
+        borrow_record = BorrowRecord(
+            user_id=current_user.id,
+            book_id=book_id,
+            borrow_date=now,
+            due_date=due_date(now, *taken)
+        )
+        db.add(borrow_record)
+        bump_catalog_version(db)
+        db.flush()
+        close_own_hold(db, current_user.id, book_id, borrow_record.id)
+        return borrow_record.id
 
-    return borrow_record
+    try:
+        borrow_id = run_in_transaction(db, borrow)
+    except IntegrityError:
+        # ix_borrow_records_active: a concurrent borrow got past the check first
+        raise HTTPException(status_code=400, detail="You already have a copy of this book borrowed")
+    return db.query(BorrowRecord).filter(BorrowRecord.id == borrow_id).first()
 
 @router.post("/return/{borrow_id}", response_model=BorrowRecordSchema)
 def return_book(
@@ -66,24 +277,39 @@ def return_book(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    borrow_record = db.query(BorrowRecord).filter(
-        BorrowRecord.id == borrow_id,
-        BorrowRecord.user_id == current_user.id
-    ).first()
-
-    if not borrow_record:
-        raise HTTPException(status_code=404, detail="Borrow record not found")
-
-    if borrow_record.is_returned:
-        raise HTTPException(status_code=400, detail="Book already returned")
-
-    borrow_record.is_returned = True
-    borrow_record.return_date = datetime.utcnow()
+    def give_back():
+        # Only one request can flip is_returned, so a copy is restored once
+        returned = db.execute(
+            update(BorrowRecord)
+            .where(
+                BorrowRecord.id == borrow_id,
+                BorrowRecord.user_id == current_user.id,
+                BorrowRecord.is_returned == False
+            )
+            .values(is_returned=True, return_date=datetime.utcnow())
+            .returning(BorrowRecord.book_id)
+            .execution_options(synchronize_session=False)
+        ).first()
 
-    book = db.query(Book).filter(Book.id == borrow_record.book_id).first()
-    book.available_copies += 1
+        if not returned:
+            borrow_record = db.query(BorrowRecord.id).filter(
+                BorrowRecord.id == borrow_id,
+                BorrowRecord.user_id == current_user.id
+            ).first()
+            if not borrow_record:
+                raise HTTPException(status_code=404, detail="Borrow record not found")
+            raise HTTPException(status_code=400, detail="Book already returned")
 
-    db.commit()
-    db.refresh(borrow_record)
+        # The copy goes to the first patron waiting for it, else back on the shelf
+        book_id = returned.book_id
+        if lend_to_next_in_queue(db, book_id) is None:
+            db.execute(
+                update(Book)
+                .where(Book.id == book_id)
+                .values(available_copies=Book.available_copies + 1)
+                .execution_options(synchronize_session=False)
+            )
+        bump_catalog_version(db)
 
-    return borrow_record
+    run_in_transaction(db, give_back)
+    return db.query(BorrowRecord).filter(BorrowRecord.id == borrow_id).first()
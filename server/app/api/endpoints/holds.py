@@ -0,0 +1,105 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from typing import List
+
+from ...db.database import get_db, run_in_transaction
+from ...db.models import HOLD_CANCELLED, HOLD_WAITING, Book, BorrowRecord, Hold, User
+from ...schemas.hold import Hold as HoldSchema
+from ...core.security import get_current_active_user
+from ..pagination import PageParams, paginate, page_response
+
+router = APIRouter()
+
+def queue_positions(db: Session, holds) -> dict:
+    """Place in its book's queue of each waiting hold, by hold id, in one statement"""
+    waiting = [hold.id for hold in holds if hold.status == HOLD_WAITING]
+    if not waiting:
+        return {}
+    # Each hold counts the waiting holds up to and including itself
+    ahead = aliased(Hold)
+    return dict(db.execute(
+        select(Hold.id, func.count(ahead.id))
+        .join(ahead, and_(ahead.book_id == Hold.book_id, ahead.status == HOLD_WAITING, ahead.id <= Hold.id))
+        .where(Hold.id.in_(waiting))
+        .group_by(Hold.id)
+    ).all())
+
+def with_positions(db: Session, holds) -> List[HoldSchema]:
+    positions = queue_positions(db, holds)
+    return [
+        HoldSchema.model_validate(hold).model_copy(update={"position": positions.get(hold.id)})
+        for hold in holds
+    ]
+
+@router.get("/", response_model=List[HoldSchema])
+def get_holds(
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if page.fields:
+        raise HTTPException(status_code=400, detail="Holds do not support field selection")
+
+    # Most recent first
+    holds = select(Hold).where(Hold.user_id == current_user.id)
+    items, next_cursor = paginate(db, holds, [(Hold.id, True)], page)
+    return page_response(with_positions(db, items), next_cursor, response)
+
+@router.post("/{book_id}", response_model=HoldSchema)
+def place_hold(
+    book_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    def place():
+        available = db.scalar(select(Book.available_copies).where(Book.id == book_id))
+        if available is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        if available > 0:
+            raise HTTPException(status_code=400, detail="Book is available; borrow it instead")
+
+        borrowed = db.query(BorrowRecord.id).filter(
+            BorrowRecord.user_id == current_user.id,
+            BorrowRecord.book_id == book_id,
+            BorrowRecord.is_returned == False
+        ).first()
+        if borrowed:
+            raise HTTPException(status_code=400, detail="You already have a copy of this book borrowed")
+
+        hold = Hold(user_id=current_user.id, book_id=book_id)
+        db.add(hold)
+        db.flush()
+        return hold
+
+    try:
+        hold = run_in_transaction(db, place)
+    except IntegrityError:
+        # ux_holds_waiting: one waiting hold per patron and book
+        raise HTTPException(status_code=400, detail="You are already waiting for this book")
+    return with_positions(db, [hold])[0]
+
+@router.delete("/{hold_id}", response_model=HoldSchema)
+def cancel_hold(
+    hold_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    def cancel():
+        cancelled = db.execute(
+            update(Hold)
+            .where(Hold.id == hold_id, Hold.user_id == current_user.id, Hold.status == HOLD_WAITING)
+            .values(status=HOLD_CANCELLED)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if not cancelled:
+            hold = db.query(Hold.id).filter(Hold.id == hold_id, Hold.user_id == current_user.id).first()
+            if not hold:
+                raise HTTPException(status_code=404, detail="Hold not found")
+            raise HTTPException(status_code=400, detail="Hold is no longer waiting")
+
+    run_in_transaction(db, cancel)
+    return db.get(Hold, hold_id)
@@ -0,0 +1,68 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+# Responses depend on the bearer token, so only the browser may store them,
+# and it must revalidate before each reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def catalog_etag(version: int, *parts) -> str:
+    """Weak ETag for a catalog view: the catalog version plus what was asked for"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'W/"catalog-{version}-{digest}"'
+
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": _http_date(last_modified),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Authorization",
+    }
+
+
+def _parse_http_date(value: str):
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    """Evaluate If-None-Match (weak comparison), falling back to If-Modified-Since,
+    against the validators in `headers` (as built by cache_headers).
+
+    When both are sent only the ETag counts (RFC 9110): Last-Modified has
+    one-second resolution, so two catalog changes within the same second
+    would look unmodified to a client that validates by date alone.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"].removeprefix("W/") in tags
+
+    since = _parse_http_date(request.headers.get("if-modified-since", ""))
+    return since is not None and _parse_http_date(headers["Last-Modified"]) <= since
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def pack_response(headers: dict, body: bytes) -> bytes:
+    """Encode headers and body as one bytes value for a cache backend"""
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def unpack_response(entry: bytes):
+    headers, body = entry.split(b"\n", 1)
+    return json.loads(headers), body
@@ -0,0 +1,165 @@
+import cProfile
+import hmac
+import io
+import pstats
+import threading
+import time
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import PlainTextResponse
+
+from ..core.config import settings
+from ..core.metrics import (
+    RequestStats, boot_timer, current_request_stats, request_db_time, request_latency, request_queries
+)
+
+# Admins sending this header get a profile of the request instead of its response
+PROFILE_HEADER = "X-Profile"
+PROFILE_LINES = 40
+
+
+class MetricsMiddleware:
+    """Record latency and SQL statements per route, and profile requests on demand.
+
+    Every response carries a Server-Timing header with its statement count and
+    database time, which makes N+1 queries visible from the browser.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # One profile at a time: a second profiler would interleave with the first
+        self._profiling = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER in headers and await is_admin_request(headers):
+            await self.profile(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing",
+                    f'db;desc="{stats.queries} statements";dur={stats.db_time * 1000:.1f}, '
+                    f"app;dur={(time.perf_counter() - started) * 1000:.1f}"
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            labels = (scope["method"], route_template(scope), str(status))
+            request_latency.observe(labels, time.perf_counter() - started)
+            request_queries.observe(labels, stats.queries)
+            request_db_time.observe(labels, stats.db_time)
+
+    async def profile(self, scope, receive, send):
+        """Run the request under cProfile and answer with the report instead.
+
+        cProfile follows the event loop thread; time spent in sync endpoints on
+        the threadpool shows up in the SQL listing rather than the call graph,
+        and other requests served meanwhile show up in it too. Only one request
+        is profiled at a time; another is refused with 503.
+        """
+        if not self._profiling.acquire(blocking=False):
+            busy = PlainTextResponse("Another request is being profiled", status_code=503)
+            busy.headers["Retry-After"] = "1"
+            await busy(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._profiling.release()
+
+    async def _profile(self, scope, receive, send):
+        stats = RequestStats(keep_statements=True)
+        token = current_request_stats.set(stats)
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.disable()
+            current_request_stats.reset(token)
+        elapsed = time.perf_counter() - started
+
+        report = io.StringIO()
+        report.write(
+            f"{scope['method']} {scope['path']} -> {status} in {elapsed * 1000:.1f}ms, "
+            f"{stats.queries} SQL statements in {stats.db_time * 1000:.1f}ms\n\n"
+        )
+        for duration, statement in stats.statements:
+            report.write(f"{duration * 1000:8.2f}ms  {' '.join(statement.split())}\n")
+        report.write("\n")
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        await PlainTextResponse(report.getvalue())(scope, receive, send)
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, so ids don't explode the label set"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def is_admin_request(headers: Headers) -> bool:
+    from ..core.security import get_current_user
+    from ..db.database import AsyncSessionLocal
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    async with AsyncSessionLocal() as db:
+        try:
+            user = await get_current_user(token, db)
+        except HTTPException:
+            return False
+    return user.is_active and user.is_admin
+
+
+async def is_metrics_request(headers: Headers) -> bool:
+    """Scrapers authenticate with METRICS_TOKEN as a bearer token, admins with their own"""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if settings.METRICS_TOKEN and scheme.lower() == "bearer":
+        if hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return True
+    return await is_admin_request(headers)
+
+
+class FirstRequestTimer:
+    """Mark the boot timer once this worker has served its first HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = True
+
+    async def __call__(self, scope, receive, send):
+        if not (self.pending and scope["type"] == "http"):
+            await self.app(scope, receive, send)
+            return
+
+        self.pending = False
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            boot_timer.mark("first_request")
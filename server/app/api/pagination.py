@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import and_, inspect, literal, or_
+
+from ..core.config import settings
+
+# List endpoints return a plain JSON array; the cursor for the next page, if
+# there is one, travels in this header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def schema_columns(model, schema, prefix: Optional[str] = None):
+    """Columns of `model` backing the fields of `schema`, in field order.
+
+    With a `prefix` they are labelled `prefix.name`, which row_dicts nests
+    under `prefix`.
+    """
+    available = inspect(model).columns
+    columns = [getattr(model, name) for name in schema.model_fields if name in available]
+    return [column.label(f"{prefix}.{column.key}") for column in columns] if prefix else columns
+
+
+def row_dicts(rows, names):
+    """The leading `names` columns of each row as a dict, ready for orjson.
+
+    Rows come straight from our own tables, so they skip the response model's
+    per-object validation.
+    """
+    flat = [(i, name) for i, name in enumerate(names) if "." not in name]
+    if len(flat) == len(names):
+        return [dict(zip(names, row)) for row in rows]
+
+    nested = {}
+    for i, name in enumerate(names):
+        if "." in name:
+            parent, child = name.split(".", 1)
+            nested.setdefault(parent, []).append((i, child))
+    items = []
+    for row in rows:
+        item = {name: row[i] for i, name in flat}
+        for parent, children in nested.items():
+            item[parent] = {child: row[i] for i, child in children}
+        items.append(item)
+    return items
+
+
+class PageParams:
+    """Query parameters shared by every paginated list endpoint"""
+
+    def __init__(
+        self,
+        after: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header"),
+        limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, description="Page size, capped server-side"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    ):
+        self.after = after
+        self.limit = min(limit, settings.MAX_PAGE_SIZE)
+        self.fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+    def columns(self, model, schema):
+        """Columns of `model` to select: the requested fields, else all of `schema`'s"""
+        columns = schema_columns(model, schema)
+        if not self.fields:
+            return columns
+
+        allowed = [column.key for column in columns]
+        unknown = [name for name in self.fields if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+            )
+        return [getattr(model, name) for name in self.fields]
+
+
+def encode_cursor(values) -> str:
+    payload = json.dumps(jsonable_encoder(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, keys):
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match ordering")
+        return [_coerce(expr, value) for (expr, _), value in zip(keys, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _coerce(expr, value):
+    if value is not None and expr.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def keyset_after(keys, values):
+    """Rows strictly after `values` in the ordering given by `keys`"""
+    bound = [literal(value, expr.type) for (expr, _), value in zip(keys, values)]
+    clauses = []
+    for i, (expr, descending) in enumerate(keys):
+        ties = [prev == value for (prev, _), value in zip(keys[:i], bound[:i])]
+        step = expr < bound[i] if descending else expr > bound[i]
+        clauses.append(and_(*ties, step))
+    return or_(*clauses)
+
+
+def page_query(stmt, keys, page: PageParams):
+    """Restrict a select() to one page ordered by `keys`, a list of (column, descending)"""
+    stmt = stmt.add_columns(*[expr.label(f"cursor_{i}") for i, (expr, _) in enumerate(keys)])
+    if page.after:
+        stmt = stmt.where(keyset_after(keys, decode_cursor(page.after, keys)))
+    stmt = stmt.order_by(None).order_by(
+        *[expr.desc() if descending else expr.asc() for expr, descending in keys]
+    )
+    return stmt.limit(page.limit + 1)
+
+
+def page_results(rows, keys, page: PageParams, projected: bool = False):
+    """Split fetched rows into the page items and the cursor for the next page.
+
+    The cursor is None on the last page. Items are ORM objects, or dicts of
+    the selected columns (see row_dicts) when `projected` is set.
+    """
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1][-len(keys):])
+
+    if projected:
+        names = rows[0]._fields[:-len(keys)] if rows else ()
+        items = row_dicts(rows, names)
+    else:
+        items = [row[0] for row in rows]
+    return items, next_cursor
+
+
+def paginate(db, stmt, keys, page: PageParams, projected: bool = False):
+    rows = db.execute(page_query(stmt, keys, page)).all()
+    return page_results(rows, keys, page, projected)
+
+
+async def paginate_async(db, stmt, keys, page: PageParams, projected: bool = False):
+    result = await db.execute(page_query(stmt, keys, page))
+    return page_results(result.all(), keys, page, projected)
+
+
+def page_response(items, next_cursor, response, projected: bool = False):
+    """Attach the next-page cursor; projected pages bypass the response model"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if projected:
+        return ORJSONResponse(content=items, headers=dict(response.headers))
+    return items
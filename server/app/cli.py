@@ -0,0 +1,93 @@
+"""Maintenance commands for the library server.
+
+Run from the server directory, e.g. `python -m app.cli migrate`.
+"""
+import argparse
+import sys
+
+from .db.database import SessionLocal, engine
+from .db.importer import IMPORT_FORMATS, guess_format, import_books, read_rows
+from .db.jobs import JOBS
+from .db.migrations import run_migrations
+from .db.search import create_search_index, rebuild_search_index
+from .db.seed import seed_database
+
+
+def migrate_command(args):
+    run_migrations()
+
+
+def seed_command(args):
+    with SessionLocal() as db:
+        if seed_database(db):
+            print("Added sample books and the test user.")
+        else:
+            print("The database already has books; nothing added.")
+
+
+def rebuild_search_index_command(args):
+    with engine.begin() as conn:
+        create_search_index(conn)
+        rebuild_search_index(conn)
+    print("Search index rebuilt.")
+
+
+def import_books_command(args):
+    fmt = args.format or guess_format(args.path)
+    if fmt not in IMPORT_FORMATS:
+        sys.exit(f"Cannot tell the format of {args.path}; pass --format")
+
+    with open(args.path, encoding="utf-8-sig", newline="") as stream, SessionLocal() as db:
+        report = import_books(db, read_rows(stream, fmt), args.batch_size)
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    print(f"Imported books: {report.inserted} inserted, {report.updated} updated, {report.failed} failed.")
+    if report.failed:
+        sys.exit(1)
+
+
+def run_job_command(args):
+    job = next(job for job in JOBS if job.name == args.job)
+    print(f"{job.name}: {job.run()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser(
+        "migrate", help="Upgrade the database schema to the latest revision"
+    )
+    migrate.set_defaults(func=migrate_command)
+
+    seed = subparsers.add_parser(
+        "seed", help="Add sample books and a test admin user to an empty database"
+    )
+    seed.set_defaults(func=seed_command)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-search-index", help="Rebuild the full-text book search index"
+    )
+    rebuild.set_defaults(func=rebuild_search_index_command)
+
+    import_cmd = subparsers.add_parser(
+        "import-books", help="Insert or update books from a CSV or JSON Lines file"
+    )
+    import_cmd.add_argument("path", help="File with title, author, genre, available_copies, total_copies")
+    import_cmd.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    import_cmd.add_argument("--batch-size", type=int, help="Rows per transaction")
+    import_cmd.set_defaults(func=import_books_command)
+
+    run_job = subparsers.add_parser(
+        "run-job", help="Run a background job once, outside the schedule"
+    )
+    run_job.add_argument("job", choices=[job.name for job in JOBS])
+    run_job.set_defaults(func=run_job_command)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
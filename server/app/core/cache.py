@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Memory is bounded by `maxsize` entries; the least recently used entry is
+    evicted first.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store `value`; `ttl` overrides the cache's own lifetime for this entry"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def purge_expired(self) -> int:
+        """Drop expired entries that nobody has looked up since; returns how many"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._data.items() if expires < now]
+            for key in expired:
+                del self._data[key]
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class MemoryCacheBackend:
+    """Per-process byte cache; each worker keeps and invalidates its own copy.
+
+    get and set are coroutines so that callers treat both backends alike.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str):
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+    def purge_expired(self) -> int:
+        return self._cache.purge_expired()
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisCacheBackend:
+    """Byte cache shared by all workers through Redis (or anything speaking its protocol).
+
+    Callers must put whatever invalidates an entry (e.g. the catalog version)
+    in its key: clear() does nothing here, and superseded entries simply
+    expire. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, namespace: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RedisCacheBackend requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self._prefix = f"{namespace}:"
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str):
+        value = await self._client.get(self._prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes):
+        await self._client.set(self._prefix + key, value, px=int(self.ttl * 1000))
+
+    def clear(self):
+        # Entries are keyed by version; old ones expire after `ttl`
+        pass
+
+    def purge_expired(self) -> int:
+        # Redis expires keys itself
+        return 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache_backend(url, namespace: str, maxsize: int, ttl: float):
+    """Shared Redis backend when `url` is set, otherwise an in-process one"""
+    if url:
+        return RedisCacheBackend(url, namespace=namespace, ttl=ttl)
+    return MemoryCacheBackend(maxsize=maxsize, ttl=ttl)
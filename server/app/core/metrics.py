@@ -0,0 +1,131 @@
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+# Request latency in seconds, and statements per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Prometheus-style histogram with one series per label combination"""
+
+    def __init__(self, name: str, documentation: str, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((labels, counts[:], count, total) for labels, (counts, count, total) in self._series.items())
+        for labels, counts, count, total in series:
+            label_text = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}'
+            yield f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}'
+            yield f"{self.name}_count{{{label_text}}} {count}"
+            yield f"{self.name}_sum{{{label_text}}} {total}"
+
+
+class BootTimer:
+    """Seconds from the start of the app import to each boot milestone of this worker"""
+
+    name = "app_boot_milestone_seconds"
+
+    def __init__(self):
+        self.started = None
+        self.milestones = {}
+
+    def start(self, started: float):
+        self.started = started
+
+    def mark(self, milestone: str):
+        """Record a milestone once, if timing was started, and report it on stderr"""
+        if self.started is None or milestone in self.milestones:
+            return
+        elapsed = self.milestones[milestone] = time.perf_counter() - self.started
+        print(f"Boot timing: {milestone} after {elapsed * 1000:.1f} ms", file=sys.stderr, flush=True)
+
+    def render(self):
+        yield f"# HELP {self.name} Seconds from the start of the app import to each boot milestone"
+        yield f"# TYPE {self.name} gauge"
+        for milestone, elapsed in self.milestones.items():
+            yield f'{self.name}{{milestone="{_escape(milestone)}"}} {elapsed}'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+ROUTE_LABELS = ("method", "route", "status")
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Time to produce a response", ROUTE_LABELS, LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    "http_request_db_statements", "SQL statements executed per request", ROUTE_LABELS, QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per request", ROUTE_LABELS, LATENCY_BUCKETS
+)
+# Only started when STARTUP_TIMING is set
+boot_timer = BootTimer()
+REGISTRY = [request_latency, request_queries, request_db_time, boot_timer]
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class RequestStats:
+    """SQL activity of one request; `statements` is only kept when profiling"""
+
+    def __init__(self, keep_statements: bool = False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = [] if keep_statements else None
+
+
+# Set by the metrics middleware for the duration of a request. Context
+# variables follow the request into the threadpool and the async engine.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(engine):
+    """Count statements and their time against the current request"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request_stats.get()
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - context.query_started
+        stats.queries += 1
+        stats.db_time += elapsed
+        if stats.statements is not None:
+            stats.statements.append((elapsed, statement))
@@ -0,0 +1,174 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fastapi import HTTPException, Request, status
+
+from .config import settings
+
+
+class MemoryRateLimitBackend:
+    """Token buckets held in this process; each worker limits on its own.
+
+    At most `maxsize` buckets are kept; evicting the least recently used one
+    only forgets how much of its burst that client had spent. take is a
+    coroutine so that callers treat both backends alike.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, burst: int, per_second: float) -> float:
+        """Spend one token from `key`'s bucket; returns 0, or seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / per_second
+            # The bucket is back to a full burst at `full_at`, after which it can go
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / per_second)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def purge_expired(self) -> int:
+        """Drop buckets that have refilled completely; returns how many"""
+        now = time.monotonic()
+        with self._lock:
+            full = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+            for key in full:
+                del self._buckets[key]
+        return len(full)
+
+
+# Refill, spend and expiry in one atomic step, on the Redis server's clock so
+# that workers on different hosts agree
+TAKE_SCRIPT = """
+local burst = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * per_second)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / per_second * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by all workers through Redis (or anything speaking its protocol).
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, namespace: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RedisRateLimitBackend requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+        self._prefix = f"{namespace}:"
+
+    async def take(self, key: str, burst: int, per_second: float) -> float:
+        return float(await self._take(keys=[self._prefix + key], args=[burst, per_second]))
+
+    def purge_expired(self) -> int:
+        # Redis expires idle buckets itself
+        return 0
+
+
+def create_rate_limit_backend(url, namespace: str, maxsize: int):
+    """Shared Redis backend when `url` is set, otherwise an in-process one"""
+    if url:
+        return RedisRateLimitBackend(url, namespace=namespace)
+    return MemoryRateLimitBackend(maxsize=maxsize)
+
+
+rate_limit_backend = create_rate_limit_backend(
+    settings.RATE_LIMIT_URL, namespace="ratelimit", maxsize=settings.RATE_LIMIT_MAX_CLIENTS
+)
+
+
+class RateLimit:
+    """Token bucket per client on one route: `burst` requests at once, refilled at `per_minute`"""
+
+    def __init__(self, name: str, burst: int, per_minute: float, backend=rate_limit_backend):
+        self.name = name
+        self.burst = burst
+        self.per_second = per_minute / 60
+        self.backend = backend
+
+    async def check(self, client: str):
+        """Spend one of `client`'s requests, or reject with 429 when none are left"""
+        if not settings.RATE_LIMIT_ENABLED or self.burst <= 0:
+            return
+        wait = await self.backend.take(f"{self.name}:{client}", self.burst, self.per_second)
+        if wait > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+class ConcurrencyLimit:
+    """Caps requests in progress on one route in this worker.
+
+    Requests over the cap are shed with 503 straight away rather than queued,
+    so the ones admitted keep their latency. A limit of 0 disables the cap.
+    """
+
+    def __init__(self, limit: int):
+        self._slots = threading.BoundedSemaphore(limit) if limit > 0 else None
+
+    @contextmanager
+    def slot(self):
+        if self._slots is None:
+            yield
+            return
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+def client_ip(request: Request) -> str:
+    """Rate limit key for anonymous requests; run uvicorn with --proxy-headers behind a proxy"""
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+# Login attempts (each costs a bcrypt hash) per account and IP, so patrons
+# behind one shared address don't lock each other out, and per IP; searches
+# per user
+login_rate_limit = RateLimit("login", settings.LOGIN_RATE_LIMIT_BURST, settings.LOGIN_RATE_LIMIT_PER_MINUTE)
+login_ip_rate_limit = RateLimit(
+    "login-ip", settings.LOGIN_IP_RATE_LIMIT_BURST, settings.LOGIN_IP_RATE_LIMIT_PER_MINUTE
+)
+search_rate_limit = RateLimit("search", settings.SEARCH_RATE_LIMIT_BURST, settings.SEARCH_RATE_LIMIT_PER_MINUTE)
+login_slots = ConcurrencyLimit(settings.LOGIN_MAX_CONCURRENT)
+catalog_slots = ConcurrencyLimit(settings.CATALOG_MAX_CONCURRENT)
@@ -1,14 +1,21 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db.database import get_db
+from ..db.database import get_async_db
 from ..db.models import User
-from ..schemas.user import TokenData
+from ..schemas.user import TokenData, User as UserSchema
+from .cache import TTLCache
+from .config import settings
 
 # to get a string like this run:
 # openssl rand -hex 32
@@ -16,24 +23,72 @@ SECRET_KEY = "09d25e094faa6ca2556c818166b7a9563b93f7099f6f0f4caa6cf63b88e8d3e7"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Authenticated users keyed by token subject (username). Entries are detached
+# snapshots, so anything that changes a user must call invalidate_principal;
+# other workers only notice once their copy expires, which is sooner for admins.
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+
+# bcrypt is CPU-bound but releases the GIL, so hashes run in parallel on a
+# dedicated pool instead of occupying the request threadpool. The semaphore
+# bounds hashes running plus waiting.
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_password_hash_slots = threading.BoundedSemaphore(
+    settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE
+)
+
+# passlib and jose take a noticeable share of worker import time, so they
+# are imported on first use rather than at startup
+@lru_cache(maxsize=None)
+def password_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_context().hash(password)
+
+async def run_password_hash(func, *args):
+    """Run a hashing function on the password pool, or fail fast with 503 when it is saturated"""
+    if not _password_hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wrap_future(password_hash_executor.submit(func, *args))
+    finally:
+        _password_hash_slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await run_password_hash(verify_password, plain_password, hashed_password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def get_password_hash_async(password):
+    return await run_password_hash(get_password_hash, password)
+
+def get_user_by_username(db: Session, username: str):
+    return db.query(User).filter(User.username == username).first()
+
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(get_user_by_username, db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -43,7 +98,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -57,11 +114,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = principal_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(select(User).where(User.username == token_data.username))
+        db_user = result.scalars().first()
+        if db_user is None:
+            raise credentials_exception
+        user = UserSchema.model_validate(db_user)
+        ttl = settings.AUTH_CACHE_ADMIN_TTL_SECONDS if user.is_admin else None
+        principal_cache.set(token_data.username, user, ttl=ttl)
     return user
 
+def invalidate_principal(username: str):
+    """Drop a cached user after its admin or active status changes, in this worker"""
+    principal_cache.pop(username)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,69 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from ..core.cache import create_cache_backend
+from ..core.config import settings
+from .models import CatalogState
+
+logger = logging.getLogger(__name__)
+
+CATALOG_STATE_ID = 1
+
+# Serialized catalog responses (see books.get_books), keyed by catalog
+# version so no worker serves a page from before a change. The in-process
+# cache is also emptied when a transaction that changed the catalog commits.
+catalog_cache = create_cache_backend(
+    settings.RESPONSE_CACHE_URL,
+    namespace="catalog",
+    maxsize=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+def bump_catalog_version(db):
+    """Mark the caller's transaction as changing the catalog.
+
+    Every write that changes what GET /books returns (including
+    available_copies on borrow and return) must call this before committing,
+    so that cached copies and ETags are invalidated. The version itself is
+    bumped once the transaction commits (see _bump_after_commit).
+    """
+    db.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    # The version row is updated in its own short transaction rather than the
+    # caller's: on PostgreSQL its row lock would otherwise be held until each
+    # borrow or return commits, serializing all circulation on this one row.
+    # Readers may see the new rows under the old version for that moment.
+    if not session.info.pop("catalog_changed", False):
+        return
+    try:
+        with session.get_bind().engine.begin() as conn:
+            conn.execute(
+                update(CatalogState)
+                .where(CatalogState.id == CATALOG_STATE_ID)
+                .values(version=CatalogState.version + 1, updated_at=datetime.utcnow())
+            )
+    except OperationalError:
+        # The change is committed either way; cached pages expire with their TTL
+        logger.exception("Could not bump the catalog version")
+    catalog_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_change(session):
+    session.info.pop("catalog_changed", None)
+
+
+async def get_catalog_state(db):
+    """Current (version, updated_at) of the catalog"""
+    result = await db.execute(
+        select(CatalogState.version, CatalogState.updated_at).where(CatalogState.id == CATALOG_STATE_ID)
+    )
+    return result.one()
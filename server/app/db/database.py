@@ -1,16 +1,86 @@
-from sqlalchemy import create_engine
+import random
+import threading
+import time
+from contextlib import nullcontext
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from ..core.config import settings
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+# Async drivers used when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def get_async_database_url(url: str) -> str:
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(
+            f"No async driver is known for {backend!r} databases; set ASYNC_DATABASE_URL "
+            f"to the same database through an async driver (e.g. mysql+aiomysql://...)"
+        )
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./library.db"
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# SQLite connections are shared across the threadpool's threads
+connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=connect_args,
+    poolclass=QueuePool,
+    **pool_options
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=AsyncAdaptedQueuePool,
+    **pool_options
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def sqlite_production_pragmas():
+    return [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_production_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+if settings.SQLITE_PRODUCTION_MODE and engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", configure_sqlite_connection)
+    event.listen(async_engine.sync_engine, "connect", configure_sqlite_connection)
+
+# Single writer: with SQLITE_SERIALIZE_WRITES, write transactions queue on
+# this lock instead of spinning on SQLite's file lock
+writer_lock = threading.Lock() if settings.SQLITE_SERIALIZE_WRITES else nullcontext()
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -18,3 +88,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async DB session, used by the read-heavy routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# PostgreSQL serialization failure and deadlock
+RETRYABLE_PGCODES = {"40001", "40P01"}
+
+def is_lock_error(exc: OperationalError) -> bool:
+    pgcode = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return "database is locked" in str(exc.orig) or pgcode in RETRYABLE_PGCODES
+
+def run_in_transaction(db, work):
+    """Run `work()` and commit, retrying the whole unit on lock contention.
+
+    `work` must only touch the database through `db` so that a rollback leaves
+    nothing behind; any other exception (e.g. HTTPException) rolls back and
+    propagates unchanged.
+    """
+    for attempt in range(settings.DB_LOCK_RETRIES + 1):
+        try:
+            with writer_lock:
+                result = work()
+                db.commit()
+            return result
+        except OperationalError as exc:
+            db.rollback()
+            if not is_lock_error(exc) or attempt == settings.DB_LOCK_RETRIES:
+                raise
+            # Exponential backoff with jitter so retries don't collide again
+            time.sleep(settings.DB_LOCK_RETRY_DELAY * (2 ** attempt) * random.uniform(0.5, 1.5))
+        except Exception:
+            db.rollback()
+            raise
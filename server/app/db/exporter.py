@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from .database import engine
+from .models import Book, BorrowRecord
+
+# Media type of each export format
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def books_export_query():
+    return select(
+        Book.id, Book.title, Book.author, Book.genre, Book.available_copies, Book.total_copies,
+        Book.loan_period_days
+    ).order_by(Book.id)
+
+
+def borrows_export_query(borrowed_from: datetime = None, borrowed_to: datetime = None):
+    """Borrow history, optionally limited to borrow_date in [borrowed_from, borrowed_to)"""
+    query = select(
+        BorrowRecord.id, BorrowRecord.user_id, BorrowRecord.book_id,
+        BorrowRecord.borrow_date, BorrowRecord.due_date, BorrowRecord.return_date,
+        BorrowRecord.is_returned, BorrowRecord.is_overdue
+    ).order_by(BorrowRecord.id)
+    if borrowed_from is not None:
+        query = query.where(BorrowRecord.borrow_date >= borrowed_from)
+    if borrowed_to is not None:
+        query = query.where(BorrowRecord.borrow_date < borrowed_to)
+    return query
+
+
+def stream_rows(query, fmt: str, batch_size: int = None):
+    """Yield the rows of a select() encoded as `fmt`, one chunk per batch.
+
+    The query must select an `id` column and be ordered by it. Batches are
+    read by keyset on that id, each in its own short read, so no lock or
+    connection is held while a slow client downloads; memory use depends on
+    the batch size, not on the size of the table. Rows changed during the
+    export show up as they are when their batch is read.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    key = query.selected_columns.id
+    columns = list(query.selected_columns.keys())
+    encode = _csv_encoder(columns) if fmt == "csv" else _ndjson_encoder(columns)
+    if fmt == "csv":
+        yield encode([columns])
+
+    last = None
+    while True:
+        batch = query if last is None else query.where(key > last)
+        with engine.connect() as conn:
+            rows = conn.execute(batch.limit(batch_size)).all()
+        if not rows:
+            return
+        yield encode(rows)
+        if len(rows) < batch_size:
+            return
+        last = rows[-1].id
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _ndjson_encoder(columns):
+    dumps = json.JSONEncoder(separators=(",", ":"), default=_plain).encode
+
+    def encode(rows):
+        return "".join(dumps(dict(zip(columns, row))) + "\n" for row in rows)
+    return encode
+
+
+def _csv_encoder(columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(rows):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        return buffer.getvalue()
+    return encode
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from .loans import due_date
+from .models import HOLD_FULFILLED, HOLD_WAITING, Book, BorrowRecord, Hold
+
+
+def lend_to_next_in_queue(db, book_id: int):
+    """Lend a returned copy to the head of the book's hold queue.
+
+    Returns the new loan's id, or None when nobody is waiting, in which case
+    the caller puts the copy back on the shelf. Finding and claiming the head
+    are indexed single-row statements, whatever the length of the queue.
+    """
+    now = datetime.utcnow()
+    while True:
+        head = db.execute(
+            select(Hold.id, Hold.user_id)
+            .where(Hold.book_id == book_id, Hold.status == HOLD_WAITING)
+            .order_by(Hold.id)
+            .limit(1)
+        ).first()
+        if head is None:
+            return None
+
+        # A concurrent return may have claimed the same head; take the next one
+        claimed = db.execute(
+            update(Hold)
+            .where(Hold.id == head.id, Hold.status == HOLD_WAITING)
+            .values(status=HOLD_FULFILLED, fulfilled_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            break
+
+    genre, loan_period_days = db.execute(
+        select(Book.genre, Book.loan_period_days).where(Book.id == book_id)
+    ).one()
+    record = BorrowRecord(
+        user_id=head.user_id,
+        book_id=book_id,
+        borrow_date=now,
+        due_date=due_date(now, genre, loan_period_days)
+    )
+    db.add(record)
+    db.flush()
+    db.execute(
+        update(Hold)
+        .where(Hold.id == head.id)
+        .values(borrow_record_id=record.id)
+        .execution_options(synchronize_session=False)
+    )
+    return record.id
+
+
+def lend_to_queue(db, book_id: int, copies: int) -> int:
+    """Lend up to `copies` copies that are about to go on the shelf to the hold queue.
+
+    For stock added by an admin or an import, so that walk-in borrowers can't
+    take it ahead of patrons already waiting. Returns how many were lent; the
+    caller shelves only the rest.
+    """
+    lent = 0
+    while lent < copies and lend_to_next_in_queue(db, book_id) is not None:
+        lent += 1
+    return lent
+
+
+def close_own_hold(db, user_id: int, book_id: int, borrow_record_id: int):
+    """Mark a patron's waiting hold as fulfilled once they borrow the book themselves"""
+    db.execute(
+        update(Hold)
+        .where(Hold.book_id == book_id, Hold.user_id == user_id, Hold.status == HOLD_WAITING)
+        .values(status=HOLD_FULFILLED, fulfilled_at=datetime.utcnow(), borrow_record_id=borrow_record_id)
+        .execution_options(synchronize_session=False)
+    )
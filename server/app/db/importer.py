@@ -0,0 +1,135 @@
+import csv
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+
+from ..core.config import settings
+from ..schemas.book import BookCreate, BookImportError, BookImportReport
+from .catalog import bump_catalog_version
+from .database import run_in_transaction
+from .holds import lend_to_queue
+from .models import HOLD_WAITING, Book, Hold
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Exports write null as an empty cell, but only these columns can be null;
+# elsewhere an empty cell is an empty string (e.g. an unknown author)
+NULLABLE_CSV_FIELDS = ("loan_period_days",)
+
+
+def guess_format(filename: str):
+    """Import format from a file name, or None if it isn't recognised"""
+    suffix = filename.rsplit(".", 1)[-1].lower() if filename and "." in filename else ""
+    return {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}.get(suffix)
+
+
+def read_rows(stream, fmt: str):
+    """Yield (line number, row dict or parse error) from a text stream, lazily"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {
+                key: None if value == "" and key in NULLABLE_CSV_FIELDS else value for key, value in row.items()
+            }
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"invalid JSON: {exc}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def import_books(db, rows, batch_size: int = None) -> BookImportReport:
+    """Validate and upsert books in chunked transactions.
+
+    Books are matched on (title, author): a match is updated in place with the
+    imported values, anything else is inserted. Rows that fail validation are
+    reported by line number and skipped; they never abort the import.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    report = BookImportReport()
+    batch = {}
+
+    def fail(line_number, error):
+        report.failed += 1
+        if len(report.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            report.errors.append(BookImportError(line=line_number, error=error))
+
+    for line_number, row in rows:
+        if isinstance(row, str):
+            fail(line_number, row)
+            continue
+        try:
+            book = BookCreate.model_validate(row)
+        except ValidationError as exc:
+            fail(line_number, "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+            ))
+            continue
+
+        # Within a batch the last row for a book wins. Files without a
+        # loan_period_days column leave existing overrides alone.
+        batch[(book.title, book.author)] = book.model_dump(exclude_unset=True)
+        if len(batch) >= batch_size:
+            _write_batch(db, batch, report)
+            batch = {}
+
+    if batch:
+        _write_batch(db, batch, report)
+    return report
+
+
+def _write_batch(db, batch: dict, report: BookImportReport):
+    def write():
+        titles = {title for title, _ in batch}
+        existing, shelved = {}, {}
+        for book_id, title, author, available in db.execute(
+            select(Book.id, Book.title, Book.author, Book.available_copies)
+            .where(Book.title.in_(titles))
+            .order_by(Book.id.desc())
+        ):
+            existing[(title, author)] = book_id
+            shelved[book_id] = available
+
+        updates = [{"id": existing[key], **values} for key, values in batch.items() if key in existing]
+        inserts = [
+            {"loan_period_days": None, **values} for key, values in batch.items() if key not in existing
+        ]
+        if updates:
+            db.execute(update(Book), updates)
+            _lend_restocked_copies(db, {
+                row["id"]: row["available_copies"] - shelved[row["id"]]
+                for row in updates if row["available_copies"] > shelved[row["id"]]
+            })
+        if inserts:
+            db.execute(insert(Book), inserts)
+        bump_catalog_version(db)
+        return len(inserts), len(updates)
+
+    inserted, updated = run_in_transaction(db, write)
+    report.inserted += inserted
+    report.updated += updated
+
+
+def _lend_restocked_copies(db, added: dict):
+    """Lend copies added by the import to waiting holds before they reach the shelf"""
+    if not added:
+        return
+    queued = db.scalars(
+        select(Hold.book_id).distinct().where(Hold.book_id.in_(added), Hold.status == HOLD_WAITING)
+    ).all()
+    for book_id in queued:
+        lent = lend_to_queue(db, book_id, added[book_id])
+        if lent:
+            db.execute(
+                update(Book)
+                .where(Book.id == book_id)
+                .values(available_copies=Book.available_copies - lent)
+                .execution_options(synchronize_session=False)
+            )
@@ -0,0 +1,65 @@
+from datetime import datetime, time
+
+from sqlalchemy import delete, func, insert, select, update
+
+from ..core.config import settings
+from ..core.ratelimit import rate_limit_backend
+from ..core.security import principal_cache
+from .catalog import catalog_cache
+from .models import Book, BorrowRecord, DailyBookCirculation, DailyGenreCirculation
+from .scheduler import Job
+
+
+def mark_overdue_loans(db) -> int:
+    """Flag active loans past their due date; a range scan of the due-date index"""
+    return db.execute(
+        update(BorrowRecord)
+        .where(
+            BorrowRecord.is_returned == False,
+            BorrowRecord.due_date < datetime.utcnow(),
+            BorrowRecord.is_overdue == False
+        )
+        .values(is_overdue=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def roll_up_circulation(db) -> int:
+    """Recount daily borrows per book and genre from the last rolled-up day on.
+
+    The last day in the rollup may have been counted while it was still in
+    progress, so it is recounted; earlier days never change.
+    """
+    since = db.scalar(select(func.max(DailyBookCirculation.day)))
+    borrows = select(
+        func.date(BorrowRecord.borrow_date), BorrowRecord.book_id, func.count()
+    ).group_by(func.date(BorrowRecord.borrow_date), BorrowRecord.book_id)
+
+    if since is not None:
+        db.execute(delete(DailyBookCirculation).where(DailyBookCirculation.day >= since))
+        db.execute(delete(DailyGenreCirculation).where(DailyGenreCirculation.day >= since))
+        borrows = borrows.where(BorrowRecord.borrow_date >= datetime.combine(since, time.min))
+
+    rows = db.execute(
+        insert(DailyBookCirculation).from_select(["day", "book_id", "borrows"], borrows)
+    ).rowcount
+
+    by_genre = select(
+        DailyBookCirculation.day, Book.genre, func.sum(DailyBookCirculation.borrows)
+    ).join(Book, Book.id == DailyBookCirculation.book_id).group_by(DailyBookCirculation.day, Book.genre)
+    if since is not None:
+        by_genre = by_genre.where(DailyBookCirculation.day >= since)
+    db.execute(insert(DailyGenreCirculation).from_select(["day", "genre", "borrows"], by_genre))
+    return rows
+
+
+def purge_expired_state(db) -> int:
+    """Free this process's cache entries that expired without being looked up again, and idle rate limit buckets"""
+    return principal_cache.purge_expired() + catalog_cache.purge_expired() + rate_limit_backend.purge_expired()
+
+
+JOBS = [
+    Job("mark_overdue_loans", settings.OVERDUE_SWEEP_INTERVAL_SECONDS, mark_overdue_loans),
+    Job("roll_up_circulation", settings.CIRCULATION_ROLLUP_INTERVAL_SECONDS, roll_up_circulation),
+    Job("purge_expired_state", settings.CACHE_PURGE_INTERVAL_SECONDS, purge_expired_state, exclusive=False),
+]
@@ -0,0 +1,14 @@
+from datetime import datetime, timedelta
+
+from ..core.config import settings
+
+
+def loan_period(genre: str, loan_period_days: int = None) -> timedelta:
+    """Loan period for a book: its own override, else its genre's, else the default"""
+    if loan_period_days:
+        return timedelta(days=loan_period_days)
+    return timedelta(days=settings.LOAN_PERIOD_DAYS_BY_GENRE.get(genre, settings.DEFAULT_LOAN_PERIOD_DAYS))
+
+
+def due_date(borrowed_at: datetime, genre: str, loan_period_days: int = None) -> datetime:
+    return borrowed_at + loan_period(genre, loan_period_days)
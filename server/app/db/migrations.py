@@ -1,31 +1,35 @@
-from sqlalchemy import create_engine, Column, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 
 # Import the database connection
-from .database import SQLALCHEMY_DATABASE_URL, engine, Base
+from .database import engine
+
+SERVER_DIR = Path(__file__).resolve().parents[2]
+
+def alembic_config() -> Config:
+    config = Config(str(SERVER_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(SERVER_DIR / "alembic"))
+    return config
 
 def run_migrations():
-    """Run database migrations"""
-    # Create a connection to the database
-    conn = engine.connect()
-    
-    try:
-        # Check if is_admin column exists in users table
-        result = conn.execute("PRAGMA table_info(users)")
-        columns = [row[1] for row in result.fetchall()]
-        
-        # Add is_admin column if it doesn't exist
-        if 'is_admin' not in columns:
-            print("Adding is_admin column to users table...")
-            conn.execute("ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT 0")
-            print("Migration completed successfully.")
-        else:
-            print("is_admin column already exists in users table.")
-    
-    except Exception as e:
-        print(f"Error during migration: {e}")
-    
-    finally:
-        # Close the connection
-        conn.close()
+    """Upgrade the database schema to the latest revision.
+
+    Run once per deploy (`python -m app.cli migrate`), not from each worker.
+    """
+    command.upgrade(alembic_config(), "head")
+
+def check_schema_version():
+    """Fail fast if the database is not at the latest schema revision"""
+    expected = set(ScriptDirectory.from_config(alembic_config()).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+
+    if current != expected:
+        raise RuntimeError(
+            f"Database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+            f"expected {', '.join(sorted(expected))}. Run `python -m app.cli migrate` first."
+        )
@@ -1,6 +1,6 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Index, Integer, String, DateTime, Text, false
 from sqlalchemy.orm import relationship
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from .database import Base
 
@@ -25,6 +25,8 @@ class Book(Base):
     genre = Column(String, index=True)
     available_copies = Column(Integer, default=1)
     total_copies = Column(Integer, default=1)
+    # Overrides the loan period of the book's genre
+    loan_period_days = Column(Integer, nullable=True)
 
     borrow_records = relationship("BorrowRecord", back_populates="book")
 
@@ -38,13 +40,116 @@ class BorrowRecord(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     book_id = Column(Integer, ForeignKey("books.id"))
     borrow_date = Column(DateTime, default=datetime.utcnow)
+    due_date = Column(DateTime)
     return_date = Column(DateTime, nullable=True)
     is_returned = Column(Boolean, default=False)
+    # Set by the overdue sweep; stays set once the book comes back late
+    is_overdue = Column(Boolean, default=False, nullable=False)
 
     user = relationship("User", back_populates="borrow_records")
     book = relationship("Book", back_populates="borrow_records")
 
-    @property
-    def due_date(self):
-        """Calculate due date as 14 days after borrowing date"""
-        return self.borrow_date + timedelta(days=14)
+    __table_args__ = (
+        # A user's history, in the order GET /borrow lists it
+        Index(
+            "ix_borrow_records_user_history",
+            user_id, is_returned, borrow_date.desc(), id.desc()
+        ),
+        # Active loans only: one per patron and book, which also backs the
+        # duplicate-borrow check and active borrow counts per book
+        Index(
+            "ix_borrow_records_active",
+            book_id, user_id,
+            unique=True,
+            sqlite_where=is_returned == false(),
+            postgresql_where=is_returned == false()
+        ),
+        # Active loans by due date, for the overdue listing, and by user, so
+        # per-user overdue counts group without touching returned loans
+        Index(
+            "ix_borrow_records_due",
+            due_date, user_id,
+            sqlite_where=is_returned == false(),
+            postgresql_where=is_returned == false()
+        ),
+        Index(
+            "ix_borrow_records_due_by_user",
+            user_id, due_date,
+            sqlite_where=is_returned == false(),
+            postgresql_where=is_returned == false()
+        ),
+        # Date ranges: incremental circulation rollups and history exports
+        Index("ix_borrow_records_borrow_date", borrow_date),
+    )
+
+# Hold statuses
+HOLD_WAITING, HOLD_FULFILLED, HOLD_CANCELLED = "waiting", "fulfilled", "cancelled"
+
+class Hold(Base):
+    """A patron's place in a book's queue; ids give the FIFO order"""
+    __tablename__ = "holds"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    status = Column(String, nullable=False, default=HOLD_WAITING)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    fulfilled_at = Column(DateTime, nullable=True)
+    # The loan a returned copy was lent out as
+    borrow_record_id = Column(Integer, ForeignKey("borrow_records.id"), nullable=True)
+
+    __table_args__ = (
+        # Head of a book's queue: the first waiting hold in id order
+        Index(
+            "ix_holds_queue",
+            book_id, id,
+            sqlite_where=status == HOLD_WAITING,
+            postgresql_where=status == HOLD_WAITING
+        ),
+        # One place per patron in each queue
+        Index(
+            "ux_holds_waiting",
+            book_id, user_id,
+            unique=True,
+            sqlite_where=status == HOLD_WAITING,
+            postgresql_where=status == HOLD_WAITING
+        ),
+        Index("ix_holds_user", user_id, id),
+    )
+
+class CatalogState(Base):
+    """Single row whose version is bumped by every write to the catalog"""
+    __tablename__ = "catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class ScheduledJob(Base):
+    """Schedule and lock of one background job, shared by all workers"""
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    next_run_at = Column(DateTime, nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+class DailyBookCirculation(Base):
+    """Borrows per book per day, maintained by the circulation rollup job"""
+    __tablename__ = "daily_book_circulation"
+
+    day = Column(Date, primary_key=True)
+    book_id = Column(Integer, primary_key=True)
+    borrows = Column(Integer, nullable=False)
+
+class DailyGenreCirculation(Base):
+    """Borrows per genre per day, maintained by the circulation rollup job"""
+    __tablename__ = "daily_genre_circulation"
+
+    day = Column(Date, primary_key=True)
+    genre = Column(String, primary_key=True)
+    borrows = Column(Integer, nullable=False)
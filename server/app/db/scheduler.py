@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..core.config import settings
+from .database import SessionLocal, run_in_transaction
+from .models import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in scheduled_jobs.locked_by
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Job:
+    """A function of a Session, run every `interval` seconds in its own transaction.
+
+    Exclusive jobs run in one worker at a time: each run is claimed by a
+    conditional UPDATE of the job's scheduled_jobs row. Non-exclusive jobs
+    only touch per-process state and run in every worker.
+    """
+
+    def __init__(self, name: str, interval: float, func, exclusive: bool = True):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.exclusive = exclusive
+        self._next_run = 0.0
+
+    def run(self):
+        with SessionLocal() as db:
+            return run_in_transaction(db, lambda: self.func(db))
+
+
+def register_jobs(jobs):
+    """Create the scheduled_jobs rows of exclusive jobs, due immediately"""
+    with SessionLocal() as db:
+        known = set(db.scalars(select(ScheduledJob.name)))
+        for job in jobs:
+            if not job.exclusive or job.name in known:
+                continue
+            db.add(ScheduledJob(name=job.name, next_run_at=datetime.utcnow()))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker registered it first
+                db.rollback()
+
+
+def claim(job: Job) -> bool:
+    """Take the job's lock if the job is due and nobody holds an unexpired lock"""
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        return run_in_transaction(db, lambda: db.execute(
+            update(ScheduledJob)
+            .where(
+                ScheduledJob.name == job.name,
+                ScheduledJob.next_run_at <= now,
+                or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now)
+            )
+            .values(
+                locked_by=WORKER_ID,
+                locked_until=now + timedelta(seconds=settings.SCHEDULER_LOCK_SECONDS),
+                last_started_at=now
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount == 1)
+
+
+def release(job: Job, error: str = None):
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        run_in_transaction(db, lambda: db.execute(
+            update(ScheduledJob)
+            .where(ScheduledJob.name == job.name, ScheduledJob.locked_by == WORKER_ID)
+            .values(
+                locked_by=None,
+                locked_until=None,
+                last_finished_at=now,
+                last_status="failed" if error else "ok",
+                last_error=error,
+                next_run_at=now + timedelta(seconds=job.interval)
+            )
+            .execution_options(synchronize_session=False)
+        ))
+
+
+def run_if_due(job: Job):
+    if not job.exclusive:
+        if time.monotonic() < job._next_run:
+            return
+        job._next_run = time.monotonic() + job.interval
+    elif not claim(job):
+        return
+
+    started = time.perf_counter()
+    try:
+        result = job.run()
+    except Exception as exc:
+        logger.exception("Background job %s failed", job.name)
+        if job.exclusive:
+            release(job, error=repr(exc))
+        return
+    if job.exclusive:
+        release(job)
+    logger.info("Background job %s: %s (%.2fs)", job.name, result, time.perf_counter() - started)
+
+
+class Scheduler:
+    """Runs due jobs every `tick` seconds on the threadpool, off the request path"""
+
+    def __init__(self, jobs, tick: float):
+        self.jobs = jobs
+        self.tick = tick
+        self._task = None
+
+    async def start(self):
+        await run_in_threadpool(register_jobs, self.jobs)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            for job in self.jobs:
+                try:
+                    await run_in_threadpool(run_if_due, job)
+                except Exception:
+                    # e.g. the database is unreachable; try again next tick
+                    logger.exception("Could not schedule background job %s", job.name)
+            await asyncio.sleep(self.tick)
@@ -0,0 +1,148 @@
+import re
+from typing import Optional
+
+from sqlalchemy import Float, Integer, cast, false, func, literal_column, or_, text
+
+from .models import Book
+
+# The catalog is mirrored into an FTS5 external-content table. Triggers on
+# `books` keep it in sync, so every write path (ORM, bulk SQL or admin CRUD)
+# updates the index in the same transaction as the row itself.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, author, genre,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title, author, genre)
+        VALUES (new.id, new.title, new.author, new.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author, genre ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title, author, genre)
+        VALUES ('delete', old.id, old.title, old.author, old.genre);
+        INSERT INTO books_fts(rowid, title, author, genre)
+        VALUES (new.id, new.title, new.author, new.genre);
+    END
+    """,
+]
+
+# On PostgreSQL the same role is played by a GIN index over a weighted
+# tsvector; search_vector() below must produce this exact expression for the
+# planner to use the index.
+POSTGRES_SEARCH_DDL = [
+    """
+    CREATE INDEX IF NOT EXISTS ix_books_search ON books USING gin ((
+        setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(author, '')), 'B') ||
+        setweight(to_tsvector('simple'::regconfig, coalesce(genre, '')), 'C')
+    ))
+    """,
+]
+
+# bm25 column weights: a hit in the title ranks above author, above genre
+TITLE_WEIGHT, AUTHOR_WEIGHT, GENRE_WEIGHT = 10.0, 5.0, 1.0
+
+
+def create_search_index(conn):
+    """Create the search index and its sync triggers if they are missing"""
+    if conn.dialect.name == "postgresql":
+        for ddl in POSTGRES_SEARCH_DDL:
+            conn.execute(text(ddl))
+        return
+    if conn.dialect.name != "sqlite":
+        return
+
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+    ).first()
+    for ddl in SQLITE_SEARCH_DDL:
+        conn.execute(text(ddl))
+
+    # Index books that were added before the index existed
+    if not exists:
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Rebuild the search index from the contents of the books table"""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("REINDEX INDEX ix_books_search"))
+        return
+    if conn.dialect.name != "sqlite":
+        return
+    conn.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+
+
+def build_match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 expression matching every term as a prefix"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def build_tsquery(query: str) -> Optional[str]:
+    """Turn free text into a PostgreSQL tsquery matching every term as a prefix"""
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def search_vector():
+    # Literals rather than bound parameters, so the expression matches the index
+    config, empty = literal_column("'simple'::regconfig"), literal_column("''")
+    weighted = [
+        func.setweight(func.to_tsvector(config, func.coalesce(column, empty)), literal_column(f"'{weight}'"))
+        for column, weight in ((Book.title, "A"), (Book.author, "B"), (Book.genre, "C"))
+    ]
+    return weighted[0].op("||")(weighted[1]).op("||")(weighted[2])
+
+
+def apply_search(books_query, query: str, dialect_name: str):
+    """Restrict a Book query to search hits.
+
+    Returns the filtered query and a relevance column to order by (lower is
+    better), or None when the backend has no ranking.
+    """
+    if dialect_name == "postgresql":
+        tsquery = build_tsquery(query)
+        if tsquery is None:
+            return books_query.filter(false()), None
+        vector, ts_query = search_vector(), func.to_tsquery(literal_column("'simple'::regconfig"), tsquery)
+        # Negated so that, as with bm25, lower sorts first
+        return books_query.filter(vector.op("@@")(ts_query)), -cast(func.ts_rank(vector, ts_query), Float)
+
+    if dialect_name != "sqlite":
+        books_query = books_query.filter(
+            or_(
+                Book.title.ilike(f"%{query}%"),
+                Book.author.ilike(f"%{query}%"),
+                Book.genre.ilike(f"%{query}%")
+            )
+        )
+        return books_query, None
+
+    match = build_match_expression(query)
+    if match is None:
+        return books_query.filter(false()), None
+
+    hits = text(
+        "SELECT rowid AS book_id, "
+        f"bm25(books_fts, {TITLE_WEIGHT}, {AUTHOR_WEIGHT}, {GENRE_WEIGHT}) AS score "
+        "FROM books_fts WHERE books_fts MATCH :match"
+    ).bindparams(match=match).columns(book_id=Integer, score=Float).subquery("hits")
+
+    return books_query.join(hits, hits.c.book_id == Book.id), hits.c.score
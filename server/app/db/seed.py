@@ -0,0 +1,76 @@
+"""Sample data for a fresh database: a handful of books and a test admin.
+
+Applied with `python -m app.cli seed`; workers never seed on startup.
+"""
+from ..core.security import get_password_hash
+from .catalog import bump_catalog_version
+from .database import run_in_transaction
+from .models import Book, User
+
+SAMPLE_BOOKS = [
+    {
+        'title': 'To Kill a Mockingbird',
+        'author': 'Harper Lee',
+        'genre': 'Fiction',
+        'available_copies': 3,
+        'total_copies': 3
+    },
+    {
+        'title': '1984',
+        'author': 'George Orwell',
+        'genre': 'Science Fiction',
+        'available_copies': 2,
+        'total_copies': 2
+    },
+    {
+        'title': 'The Great Gatsby',
+        'author': 'F. Scott Fitzgerald',
+        'genre': 'Fiction',
+        'available_copies': 1,
+        'total_copies': 1
+    },
+    {
+        'title': 'Pride and Prejudice',
+        'author': 'Jane Austen',
+        'genre': 'Romance',
+        'available_copies': 2,
+        'total_copies': 2
+    },
+    {
+        'title': 'The Hobbit',
+        'author': 'J.R.R. Tolkien',
+        'genre': 'Fantasy',
+        'available_copies': 2,
+        'total_copies': 2
+    }
+]
+
+TEST_USERNAME = "testuser"
+TEST_PASSWORD = "password123"
+
+
+def seed_database(db) -> bool:
+    """Add the sample books, and the test user if there are no users, to a database without books.
+
+    Returns False, changing nothing, when the catalog already has books.
+    """
+    if db.query(Book.id).first() is not None:
+        return False
+
+    hashed_password = None
+    if db.query(User.id).first() is None:
+        hashed_password = get_password_hash(TEST_PASSWORD)
+
+    def seed():
+        db.add_all(Book(**book_data) for book_data in SAMPLE_BOOKS)
+        if hashed_password is not None:
+            db.add(User(
+                username=TEST_USERNAME,
+                email="test@example.com",
+                hashed_password=hashed_password,
+                is_admin=True
+            ))
+        bump_catalog_version(db)
+
+    run_in_transaction(db, seed)
+    return True
@@ -1,19 +1,23 @@
-from fastapi import FastAPI
+import time
+
+# Boot timing (STARTUP_TIMING) counts from here, before the heavy imports
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
 from .api.api import api_router
+from .api.middleware import FirstRequestTimer, MetricsMiddleware, is_metrics_request
+from .api.pagination import NEXT_CURSOR_HEADER
 from .core.config import settings
-from .db.database import engine
-from .db import models
-from .db.migrations import run_migrations
-
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+from .core.metrics import boot_timer, instrument_engine, render_metrics
+from .db.database import async_engine, engine
+from .db.jobs import JOBS
+from .db.migrations import check_schema_version
+from .db.scheduler import Scheduler
 
-# Run migrations
-run_migrations()
-
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=ORJSONResponse)
 
 # Set up CORS
 app.add_middleware(
@@ -22,79 +26,49 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Per-route latency and SQL statement metrics, served on /metrics
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# Add initial data
-@app.on_event("startup")
-async def startup_event():
-    from sqlalchemy.orm import Session
-    from .db.database import SessionLocal
-    from .db.models import Book, User
-    from .core.security import get_password_hash
-
-    db = SessionLocal()
+# Overdue sweeps, circulation rollups and cache purging, off the request path
+scheduler = Scheduler(JOBS, tick=settings.SCHEDULER_TICK_SECONDS)
 
-    # Check if we need to add initial data
-    if db.query(Book).count() == 0:
-        initial_books = [
-            {
-                'title': 'To Kill a Mockingbird',
-                'author': 'Harper Lee',
-                'genre': 'Fiction',
-                'available_copies': 3,
-                'total_copies': 3
-            },
-            {
-                'title': '1984',
-                'author': 'George Orwell',
-                'genre': 'Science Fiction',
-                'available_copies': 2,
-                'total_copies': 2
-            },
-            {
-                'title': 'The Great Gatsby',
-                'author': 'F. Scott Fitzgerald',
-                'genre': 'Fiction',
-                'available_copies': 1,
-                'total_copies': 1
-            },
-            {
-                'title': 'Pride and Prejudice',
-                'author': 'Jane Austen',
-                'genre': 'Romance',
-                'available_copies': 2,
-                'total_copies': 2
-            },
-            {
-                'title': 'The Hobbit',
-                'author': 'J.R.R. Tolkien',
-                'genre': 'Fantasy',
-                'available_copies': 2,
-                'total_copies': 2
-            }
-        ]
+# Time to import, to finish startup and to serve the first request
+if settings.STARTUP_TIMING:
+    boot_timer.start(IMPORT_STARTED)
+    app.add_middleware(FirstRequestTimer)
 
-        for book_data in initial_books:
-            book = Book(**book_data)
-            db.add(book)
+@app.on_event("startup")
+async def startup_event():
+    # Migrations run once per deploy (`python -m app.cli migrate`) and sample
+    # data is loaded with `python -m app.cli seed`; workers only confirm the
+    # schema is current
+    check_schema_version()
 
-        # Create a test user
-        if db.query(User).count() == 0:
-            test_user = User(
-                username="testuser",
-                email="test@example.com",
-                hashed_password=get_password_hash("password123"),
-                is_admin=True
-            )
-            db.add(test_user)
+    if settings.SCHEDULER_ENABLED:
+        await scheduler.start()
+    boot_timer.mark("started")
 
-        db.commit()
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.stop()
 
-    db.close()
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not await is_metrics_request(request.headers):
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Library Management System API"}
+
+boot_timer.mark("imported")
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from datetime import date
+
+class BookBorrowCount(BaseModel):
+    book_id: int
+    title: str
+    author: str
+    borrows: int
+
+class Utilization(BaseModel):
+    titles: int
+    total_copies: int
+    available_copies: int
+    active_loans: int
+    utilization: float
+
+class GenreUtilization(Utilization):
+    genre: str
+
+class DailyBorrows(BaseModel):
+    day: date
+    borrows: int
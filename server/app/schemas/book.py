@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class BookBase(BaseModel):
     title: str
@@ -7,6 +7,7 @@ class BookBase(BaseModel):
     genre: str
     available_copies: int
     total_copies: int
+    loan_period_days: Optional[int] = None
 
 class BookCreate(BookBase):
     pass
@@ -20,3 +21,13 @@ class Book(BookBase):
 
 class BookSearch(BaseModel):
     query: Optional[str] = None
+
+class BookImportError(BaseModel):
+    line: int
+    error: str
+
+class BookImportReport(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BookImportError] = []
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from .book import Book
 from .user import User
 
@@ -14,8 +14,10 @@ class BorrowRecord(BorrowRecordBase):
     id: int
     user_id: int
     borrow_date: datetime
+    due_date: datetime
     return_date: Optional[datetime] = None
     is_returned: bool
+    is_overdue: bool = False
 
     model_config = {
         "from_attributes": True
@@ -23,4 +25,28 @@ class BorrowRecord(BorrowRecordBase):
 
 class BorrowRecordDetail(BorrowRecord):
     book: Book
-    due_date: datetime
+
+# Batch circulation: a whole stack of books in one request
+MAX_BATCH_ITEMS = 50
+
+class BorrowBatch(BaseModel):
+    book_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class ReturnBatch(BaseModel):
+    borrow_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+
+class BorrowBatchResult(BaseModel):
+    book_id: int
+    record: Optional[BorrowRecord] = None
+    error: Optional[str] = None
+
+class ReturnBatchResult(BaseModel):
+    borrow_id: int
+    record: Optional[BorrowRecord] = None
+    error: Optional[str] = None
+
+class OverdueUser(BaseModel):
+    user_id: int
+    username: str
+    overdue_count: int
+    oldest_due_date: datetime
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class Hold(BaseModel):
+    id: int
+    book_id: int
+    user_id: int
+    status: str
+    created_at: datetime
+    fulfilled_at: Optional[datetime] = None
+    borrow_record_id: Optional[int] = None
+    # 1 for the head of the queue; only set while waiting
+    position: Optional[int] = None
+
+    model_config = {
+        "from_attributes": True
+    }
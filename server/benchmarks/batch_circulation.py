@@ -0,0 +1,105 @@
+"""Circulation desk benchmark: single-item vs batch borrow and return.
+
+Each of `--patrons` patrons checks out a stack of `--stack` books and then
+returns it, once through the single-item endpoints (one request and one
+commit per book) and once through POST /borrow/borrow/batch and
+/borrow/return/batch (one of each per stack). Runs in-process against a
+scratch SQLite database.
+
+    python -m benchmarks.batch_circulation --patrons 50 --stack 15 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .scratch import use_scratch_database
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def run(args):
+    use_scratch_database()
+    from sqlalchemy import event, insert
+    from sqlalchemy.orm import Session
+
+    from app.main import app
+    from app.core.security import create_access_token
+    from app.db.database import engine
+    from app.db.migrations import run_migrations
+    from app.db.models import Book, User
+
+    run_migrations()
+    with engine.begin() as conn:
+        conn.execute(insert(Book), [
+            {"title": f"Book {i}", "author": "Author", "genre": "Fiction",
+             "available_copies": args.patrons, "total_copies": args.patrons}
+            for i in range(args.stack)
+        ])
+        conn.execute(insert(User), [
+            {"username": f"patron{i}", "email": f"patron{i}@example.com",
+             "hashed_password": "x", "is_active": True, "is_admin": False}
+            for i in range(args.patrons)
+        ])
+
+    commits = []
+    event.listen(Session, "after_commit", lambda session: commits.append(1))
+    tokens = [create_access_token({"sub": f"patron{i}"}) for i in range(args.patrons)]
+
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        book_ids = list(range(1, args.stack + 1))
+        gate = asyncio.Semaphore(args.concurrency)
+
+        async def single(token):
+            headers = {"Authorization": f"Bearer {token}"}
+            borrow_ids = []
+            for book_id in book_ids:
+                response = await client.post(f"/api/v1/borrow/borrow/{book_id}", headers=headers)
+                borrow_ids.append(response.json()["id"])
+            for borrow_id in borrow_ids:
+                await client.post(f"/api/v1/borrow/return/{borrow_id}", headers=headers)
+
+        async def batch(token):
+            headers = {"Authorization": f"Bearer {token}"}
+            response = await client.post(
+                "/api/v1/borrow/borrow/batch", json={"book_ids": book_ids}, headers=headers
+            )
+            borrow_ids = [result["record"]["id"] for result in response.json()]
+            await client.post(
+                "/api/v1/borrow/return/batch", json={"borrow_ids": borrow_ids}, headers=headers
+            )
+
+        for name, checkout in (("single", single), ("batch", batch)):
+            times = []
+            commits.clear()
+
+            async def patron(token):
+                async with gate:
+                    started = time.perf_counter()
+                    await checkout(token)
+                    times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(patron(token) for token in tokens))
+            elapsed = time.perf_counter() - started
+            print(f"{name:>6}: {args.patrons} stacks of {args.stack} in {elapsed:.2f}s "
+                  f"({args.patrons * args.stack * 2 / elapsed:.0f} items/s), {len(commits)} commits, "
+                  f"per stack p50={percentile(times, 50) * 1000:.0f}ms p95={percentile(times, 95) * 1000:.0f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patrons", type=int, default=50)
+    parser.add_argument("--stack", type=int, default=15)
+    parser.add_argument("--concurrency", type=int, default=10)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Stress test: many concurrent borrows of a single popular book.
+
+Fires `--borrows` parallel borrow requests (one per patron) at one book with
+fewer copies than patrons, through the real endpoint functions on a scratch
+SQLite database, and reports their throughput and outcomes. That no copy is
+lent twice is checked by tests/test_borrow.py.
+
+    python -m benchmarks.borrow_contention --borrows 2000 --copies 500 --threads 32
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.endpoints.borrow import borrow_book
+from app.db.database import Base
+from app.db.models import Book, BorrowRecord, User
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--borrows", type=int, default=2000)
+    parser.add_argument("--copies", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "contention.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        book = Book(title="Popular", author="Author", genre="Fiction",
+                    available_copies=args.copies, total_copies=args.copies)
+        db.add(book)
+        db.add_all(User(username=f"patron{i}", email=f"patron{i}@example.com", hashed_password="x")
+                   for i in range(args.borrows))
+        db.commit()
+        book_id = book.id
+        users = db.query(User).all()
+        db.expunge_all()
+
+    def attempt(user):
+        with Session() as db:
+            try:
+                borrow_book(book_id, db=db, current_user=user)
+                return "ok"
+            except HTTPException as exc:
+                return exc.detail
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outcomes = list(pool.map(attempt, users))
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        remaining = db.query(Book.available_copies).filter(Book.id == book_id).scalar()
+        active = db.query(BorrowRecord).filter(BorrowRecord.is_returned == False).count()
+
+    succeeded = outcomes.count("ok")
+    print(f"{len(outcomes)} borrows in {elapsed:.2f}s ({len(outcomes) / elapsed:.0f} req/s)")
+    print(f"succeeded={succeeded} rejected={len(outcomes) - succeeded} "
+          f"remaining_copies={remaining} active_loans={active}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Fill a database with a synthetic library for load tests.
+
+Generates books, users and a borrow history straight into DATABASE_URL
+(migrating it first), in chunked bulk inserts. The data is deterministic
+for a given `--seed`, so runs on different commits see the same dataset:
+
+- book and genre popularity follow a Zipf-like skew, so a few titles get
+  most of the borrows
+- borrows are spread over `--days` days of history; the ones from the last
+  loan period are still out, up to each book's number of copies
+- every user's password is `password123`; `admin` is an admin
+
+Run from the server directory. The full-size dataset takes a while:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.generate_data \\
+        --books 1000000 --users 100000 --borrows 10000000
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, insert, text, update
+
+PASSWORD = "password123"
+ADMIN_USERNAME = "admin"
+
+GENRES = [
+    "Fiction", "Mystery", "Romance", "Science Fiction", "Fantasy", "Thriller", "Biography",
+    "History", "Science", "Self-Help", "Children", "Young Adult", "Poetry", "Horror",
+    "Travel", "Cooking", "Art", "Philosophy", "Religion", "Business", "Reference",
+]
+
+# Search terms for the load test come from the same vocabulary
+WORDS = [
+    "shadow", "river", "garden", "winter", "empire", "secret", "journey", "silence", "fire", "ocean",
+    "glass", "stone", "midnight", "summer", "kingdom", "storm", "memory", "island", "mountain", "city",
+    "letters", "night", "light", "forest", "house", "star", "road", "bridge", "crown", "mirror",
+    "wolf", "raven", "rose", "iron", "golden", "silver", "last", "lost", "hidden", "broken",
+    "quiet", "wild", "dark", "bright", "little", "long", "distant", "burning", "falling", "rising",
+    "history", "science", "guide", "art", "life", "war", "peace", "love", "time", "world",
+    "machine", "code", "theory", "atlas", "kitchen", "voyage", "harbor", "desert", "valley", "tower",
+]
+FIRST_NAMES = [
+    "Ada", "Alan", "Amara", "Ana", "Ben", "Chen", "Dara", "Elena", "Farah", "Grace", "Hiro", "Ines",
+    "Jon", "Kemi", "Lars", "Maya", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Sam", "Tomas", "Uma",
+    "Victor", "Wen", "Yara", "Zane",
+]
+LAST_NAMES = [
+    "Abbott", "Baker", "Castillo", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ibrahim", "Jensen",
+    "Kim", "Lopez", "Moreau", "Nakamura", "Okafor", "Patel", "Quiroga", "Rossi", "Singh", "Tanaka",
+    "Underwood", "Vargas", "Weber", "Xu", "Yilmaz", "Zhou",
+]
+
+LOAN_DAYS = 14
+
+
+def chunked(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def zipf_weights(n, skew):
+    """Cumulative weights for picking index i with probability ~ 1 / (i + 1) ** skew"""
+    total, cumulative = 0.0, []
+    for i in range(n):
+        total += 1.0 / (i + 1) ** skew
+        cumulative.append(total)
+    return cumulative
+
+
+def pick(rng, cumulative):
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+def generate(args):
+    from app.core.security import get_password_hash
+    from app.db.database import SessionLocal, engine, run_in_transaction
+    from app.db.jobs import roll_up_circulation
+    from app.db.migrations import run_migrations
+    from app.db.models import Book, BorrowRecord, User
+
+    run_migrations()
+    with SessionLocal() as db:
+        if db.query(Book.id).first() is not None:
+            raise SystemExit("The database already has books; point DATABASE_URL at an empty one")
+    rng = random.Random(args.seed)
+    now = datetime.utcnow().replace(microsecond=0)
+
+    def insert_rows(table, rows, label, total):
+        started = time.perf_counter()
+        done = 0
+        for chunk in chunked(rows, args.chunk_size):
+            with engine.begin() as conn:
+                if conn.dialect.name == "sqlite":
+                    # A throwaway dataset does not need crash safety
+                    conn.exec_driver_sql("PRAGMA synchronous=OFF")
+                conn.execute(insert(table), chunk)
+            done += len(chunk)
+            print(f"\r{label}: {done}/{total}", end="", flush=True)
+        print(f"\r{label}: {done} in {time.perf_counter() - started:.1f}s")
+
+    # Books: genres and titles are skewed, copies mostly 1-3
+    genre_weights = zipf_weights(len(GENRES), 0.8)
+    copies = [rng.choice((1, 1, 1, 2, 2, 3, 5)) for _ in range(args.books)]
+
+    def books():
+        for i in range(args.books):
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+            yield {
+                "title": f"{title} {i}" if rng.random() < 0.3 else title,
+                "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "genre": GENRES[pick(rng, genre_weights)],
+                "available_copies": copies[i],
+                "total_copies": copies[i],
+            }
+
+    insert_rows(Book, books(), "books", args.books)
+
+    # Users: one bcrypt hash shared by everyone, so logins work without
+    # spending minutes hashing
+    hashed = get_password_hash(PASSWORD)
+
+    def users():
+        yield {"username": ADMIN_USERNAME, "email": "admin@example.com",
+               "hashed_password": hashed, "is_active": True, "is_admin": True}
+        for i in range(1, args.users):
+            yield {"username": f"user{i}", "email": f"user{i}@example.com",
+                   "hashed_password": hashed, "is_active": True, "is_admin": False}
+
+    insert_rows(User, users(), "users", args.users)
+
+    # Borrows in chronological order. Book ids are shuffled so that popular
+    # books are spread over the id range rather than all at the start.
+    popularity = zipf_weights(args.books, 0.9)
+    book_order = list(range(1, args.books + 1))
+    rng.shuffle(book_order)
+    user_activity = zipf_weights(args.users, 0.6)
+    active = [0] * (args.books + 1)
+    active_pairs = set()
+    history = timedelta(days=args.days)
+    still_out = now - timedelta(days=LOAN_DAYS)
+
+    def borrows():
+        for i in range(args.borrows):
+            borrowed_at = now - history + history * (i / args.borrows)
+            book_id = book_order[pick(rng, popularity)]
+            user_id = pick(rng, user_activity) + 1
+            due = borrowed_at + timedelta(days=LOAN_DAYS)
+            returned = True
+            if borrowed_at >= still_out and active[book_id] < copies[book_id - 1] \
+                    and (user_id, book_id) not in active_pairs and rng.random() < 0.8:
+                returned = False
+                active[book_id] += 1
+                active_pairs.add((user_id, book_id))
+            yield {
+                "user_id": user_id,
+                "book_id": book_id,
+                "borrow_date": borrowed_at,
+                "due_date": due,
+                "return_date": None if not returned else borrowed_at + timedelta(days=rng.uniform(1, LOAN_DAYS + 7)),
+                "is_returned": returned,
+                "is_overdue": not returned and due < now,
+            }
+
+    insert_rows(BorrowRecord, borrows(), "borrows", args.borrows)
+
+    books_table = Book.__table__
+    on_loan = [{"book_id": book_id, "on_loan": count} for book_id, count in enumerate(active) if count]
+    for chunk in chunked(on_loan, args.chunk_size):
+        with engine.begin() as conn:
+            conn.execute(
+                update(books_table)
+                .where(books_table.c.id == bindparam("book_id"))
+                .values(available_copies=books_table.c.total_copies - bindparam("on_loan")),
+                chunk
+            )
+    print(f"active loans: {sum(active)}")
+
+    with SessionLocal() as db:
+        print(f"circulation rollup rows: {run_in_transaction(db, lambda: roll_up_circulation(db))}")
+    with engine.begin() as conn:
+        # Planner statistics, as a long-running database would have
+        conn.execute(text("ANALYZE"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--borrows", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730, help="Length of the borrow history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Rows per insert transaction")
+    generate(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Hold queue benchmark: cost of a return as the queue for a book grows.
+
+For each queue length, a single-copy book gets that many waiting holds; the
+copy is then returned `--returns` times in a row, each return lending it to
+the head of the queue. The time per return should not depend on the queue
+length.
+
+    python -m benchmarks.hold_queue --queues 10 1000 10000 --returns 200
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from .scratch import use_scratch_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queues", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--returns", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    use_scratch_database()
+    from app.api.endpoints.borrow import borrow_book, return_book
+    from app.db.database import SessionLocal, engine
+    from app.db.migrations import run_migrations
+    from app.db.models import Book, BorrowRecord, Hold, User
+
+    run_migrations()
+    patrons = max(args.queues) + 1
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": f"patron{i}", "email": f"patron{i}@example.com",
+             "hashed_password": "x", "is_active": True, "is_admin": False}
+            for i in range(patrons)
+        ])
+
+    with SessionLocal() as db:
+        users = {user.id: user for user in db.scalars(select(User))}
+        db.expunge_all()
+
+    for queue in args.queues:
+        with engine.begin() as conn:
+            book_id = conn.execute(insert(Book).returning(Book.id), [
+                {"title": f"Popular {queue}", "author": "Author", "genre": "Fiction",
+                 "available_copies": 1, "total_copies": 1}
+            ]).scalar_one()
+
+        first = users[1]
+        with SessionLocal() as db:
+            borrow_id = borrow_book(book_id, db=db, current_user=first).id
+
+        with engine.begin() as conn:
+            conn.execute(insert(Hold), [
+                {"user_id": user_id, "book_id": book_id, "status": "waiting", "created_at": datetime.utcnow()}
+                for user_id in range(2, queue + 2)
+            ])
+
+        holder, elapsed = first, 0.0
+        for _ in range(min(args.returns, queue)):
+            with SessionLocal() as db:
+                started = time.perf_counter()
+                return_book(borrow_id, db=db, current_user=holder)
+                elapsed += time.perf_counter() - started
+                borrow_id, user_id = db.execute(
+                    select(BorrowRecord.id, BorrowRecord.user_id)
+                    .where(BorrowRecord.book_id == book_id, BorrowRecord.is_returned == False)
+                ).one()
+            holder = users[user_id]
+
+        returns = min(args.returns, queue)
+        print(f"queue of {queue:>6}: {returns} returns, {elapsed / returns * 1000:.2f}ms per return")
+
+
+if __name__ == "__main__":
+    main()
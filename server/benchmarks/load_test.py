@@ -0,0 +1,246 @@
+"""Drive the API with a weighted mix of requests and report latency per route.
+
+Meant to run against a dataset from `benchmarks.generate_data`. Each of
+`--concurrency` virtual users logs in, then loops for `--duration` seconds
+picking a scenario by weight:
+
+- search: GET /books/?query=<one or two catalog words>
+- books: GET /books/ pages, following the next-page cursor
+- borrow: borrow a random book and, if that worked, return it
+- admin: the admin borrow, overdue and user listings
+- login: POST /auth/token
+
+By default the app runs in this process on DATABASE_URL (with the scheduler
+and rate limits off); `--url` targets a running server instead, e.g. a local
+uvicorn started with RATE_LIMIT_ENABLED=false:
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.load_test \\
+        --books 1000000 --users 100000 --concurrency 32 --output before.json
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.load_test \\
+        --books 1000000 --users 100000 --concurrency 32 --output after.json --baseline before.json
+
+The JSON report holds p50/p95/p99 latency, throughput and status codes per
+request, plus the commit and arguments it was measured with.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import httpx
+
+from .generate_data import ADMIN_USERNAME, PASSWORD, WORDS
+
+API = "/api/v1"
+SCENARIOS = {"search": 40, "books": 20, "borrow": 20, "admin": 10, "login": 10}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Recorder:
+    """Latencies and status codes per request name, outside the warmup"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.recording = False
+
+    async def request(self, client, name, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as exc:
+            response, status = None, type(exc).__name__
+        if self.recording:
+            self.latencies[name].append(time.perf_counter() - started)
+            self.statuses[name][status] += 1
+        return response
+
+    def report(self, duration):
+        results = {}
+        for name in sorted(self.latencies):
+            samples = self.latencies[name]
+            statuses = self.statuses[name]
+            results[name] = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / duration, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                # Rejected borrows (400) are part of the workload; 5xx and
+                # transport failures are not
+                "errors": sum(count for status, count in statuses.items() if not status.startswith(("2", "3", "4"))),
+                "statuses": dict(statuses),
+            }
+        return results
+
+
+def username_for(n, args):
+    return f"user{n % (args.users - 1) + 1}"
+
+
+async def login(recorder, client, username):
+    response = await recorder.request(
+        client, "login", "POST", f"{API}/auth/token", data={"username": username, "password": PASSWORD}
+    )
+    if response is None or response.status_code != 200:
+        raise SystemExit(f"Could not log in as {username}; is the dataset from benchmarks.generate_data loaded?")
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def virtual_user(n, args, client, recorder, headers, admin_headers, deadline):
+    rng = random.Random(args.seed + n)
+    username = username_for(n, args)
+    names, weights = zip(*args.mix.items())
+    cursor = None
+
+    while time.perf_counter() < deadline:
+        scenario = rng.choices(names, weights)[0]
+        if scenario == "search":
+            query = " ".join(rng.sample(WORDS, rng.choice((1, 1, 2))))
+            await recorder.request(client, "search", "GET", f"{API}/books/",
+                                   params={"query": query, "limit": 20}, headers=headers)
+        elif scenario == "books":
+            params = {"limit": 50, **({"after": cursor} if cursor else {})}
+            response = await recorder.request(client, "books", "GET", f"{API}/books/", params=params, headers=headers)
+            cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+        elif scenario == "borrow":
+            book_id = rng.randint(1, args.books)
+            response = await recorder.request(client, "borrow", "POST", f"{API}/borrow/borrow/{book_id}", headers=headers)
+            if response is not None and response.status_code == 200:
+                await recorder.request(client, "return", "POST",
+                                       f"{API}/borrow/return/{response.json()['id']}", headers=headers)
+        elif scenario == "admin":
+            listing = rng.choice(("borrows", "overdue", "users"))
+            await recorder.request(client, f"admin_{listing}", "GET", f"{API}/admin/{listing}",
+                                   params={"limit": 50}, headers=admin_headers)
+        else:
+            await login(recorder, client, username)
+
+
+async def run(args):
+    recorder = Recorder()
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        # Background jobs would compete with the measured requests, and every
+        # virtual user shares one client address
+        os.environ.setdefault("SCHEDULER_ENABLED", "false")
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        from app.main import app
+
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+
+    async with client:
+        # Sessions are opened before the clock starts; logins in the mix are
+        # measured separately. A few at a time, to stay under the server's cap
+        # on concurrent logins.
+        gate = asyncio.Semaphore(4)
+
+        async def open_session(username):
+            async with gate:
+                return await login(recorder, client, username)
+
+        admin_headers = await open_session(ADMIN_USERNAME)
+        sessions = await asyncio.gather(*[open_session(username_for(n, args)) for n in range(args.concurrency)])
+
+        started = time.perf_counter()
+        deadline = started + args.warmup + args.duration
+        users = [
+            asyncio.create_task(virtual_user(n, args, client, recorder, headers, admin_headers, deadline))
+            for n, headers in enumerate(sessions)
+        ]
+        await asyncio.sleep(max(0.0, started + args.warmup - time.perf_counter()))
+        recorder.recording = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*users)
+        measured = time.perf_counter() - measured_from
+
+    if not args.url:
+        await app.router.shutdown()
+    return recorder.report(measured)
+
+
+def print_results(results, baseline=None):
+    print(f"{'request':>16} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for name, result in results.items():
+        line = (f"{name:>16} {result['requests']:>7} {result['throughput_rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>6}")
+        before = (baseline or {}).get(name)
+        if before and before["p95_ms"] and before["throughput_rps"]:
+            line += (f"   p95 {100 * (result['p95_ms'] / before['p95_ms'] - 1):+.0f}%"
+                     f", req/s {100 * (result['throughput_rps'] / before['throughput_rps'] - 1):+.0f}%")
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server; the app runs in-process if omitted")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds run before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users")
+    parser.add_argument("--mix", type=parse_mix, default=dict(SCENARIOS),
+                        help="Scenario weights, e.g. search=3,borrow=1 (default: %(default)s)")
+    parser.add_argument("--books", type=int, default=100000, help="Books in the dataset")
+    parser.add_argument("--users", type=int, default=10000, help="Users in the dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="A previous report to compare against")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "python": platform.python_version(),
+                "target": args.url or "in-process",
+                "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Login storm benchmark.
+
+Sends `--logins` concurrent POST /auth/token requests to the app in-process
+while timing a cheap endpoint alongside, to show that bcrypt work no longer
+starves other requests. Logins shed by the concurrency caps (503) are
+counted separately; the per-client rate limit is turned off, since every
+login comes from the same address.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from .scratch import use_scratch_database
+
+USERNAME, PASSWORD = "testuser", "password123"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def run(args):
+    use_scratch_database()
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app.main import app
+    from app.db.database import SessionLocal
+    from app.db.migrations import run_migrations
+    from app.db.seed import seed_database
+
+    run_migrations()
+    with SessionLocal() as db:
+        seed_database(db)
+
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        gate = asyncio.Semaphore(args.concurrency)
+        statuses, login_times, probe_times = [], [], []
+        done = asyncio.Event()
+
+        async def login():
+            async with gate:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/token", data={"username": USERNAME, "password": PASSWORD}
+                )
+                login_times.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_times.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    ok = statuses.count(200)
+    print(f"{args.logins} logins in {elapsed:.2f}s: {ok / elapsed:.1f} successful logins/s, "
+          f"{statuses.count(503)} shed with 503")
+    print(f"login latency p50={percentile(login_times, 50) * 1000:.0f}ms "
+          f"p95={percentile(login_times, 95) * 1000:.0f}ms")
+    print(f"GET / during the storm: p50={statistics.median(probe_times) * 1000:.1f}ms "
+          f"p95={percentile(probe_times, 95) * 1000:.1f}ms over {len(probe_times)} probes")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
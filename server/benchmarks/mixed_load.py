@@ -0,0 +1,121 @@
+"""Mixed read/write load on SQLite in each journal/writer mode.
+
+Readers page through GET /books/ while writers borrow and return books, for
+`--duration` seconds per mode. Each mode runs in a fresh process because the
+engine is configured from settings at import time.
+
+    python -m benchmarks.mixed_load --duration 10 --readers 32 --writers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .scratch import use_scratch_database
+
+MODES = {
+    "default": {},
+    "production": {"SQLITE_PRODUCTION_MODE": "true"},
+    "production+single-writer": {"SQLITE_PRODUCTION_MODE": "true", "SQLITE_SERIALIZE_WRITES": "true"},
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def drive(args):
+    use_scratch_database()
+    from app.main import app
+    from app.db.migrations import run_migrations
+    from app.db.seed import seed_database
+
+    run_migrations()
+    from app.core.security import create_access_token
+    from app.db.database import SessionLocal
+    from app.db.models import Book, User
+
+    with SessionLocal() as db:
+        seed_database(db)
+
+    await app.router.startup()
+    with SessionLocal() as db:
+        db.add_all(Book(title=f"Book {i}", author=f"Author {i % 97}", genre="Fiction",
+                        available_copies=args.writers, total_copies=args.writers) for i in range(1000))
+        db.add_all(User(username=f"writer{i}", email=f"writer{i}@example.com", hashed_password="x")
+                   for i in range(args.writers))
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    read_times, write_times, errors = [], [], 0
+    deadline = time.perf_counter() + args.duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def reader():
+            nonlocal errors
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': 'testuser'})}"}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get("/api/v1/books/?limit=50", headers=headers)
+                read_times.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        async def writer(n):
+            nonlocal errors
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': f'writer{n}'})}"}
+            book_id = 1
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post(f"/api/v1/borrow/borrow/{book_id}", headers=headers)
+                if response.status_code == 200:
+                    response = await client.post(f"/api/v1/borrow/return/{response.json()['id']}", headers=headers)
+                write_times.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+                book_id = book_id % 1000 + 1
+
+        await asyncio.gather(*[reader() for _ in range(args.readers)], *[writer(n) for n in range(args.writers)])
+
+    return {
+        "reads_per_s": len(read_times) / args.duration,
+        "read_p50_ms": percentile(read_times, 50) * 1000,
+        "read_p95_ms": percentile(read_times, 95) * 1000,
+        "read_p99_ms": percentile(read_times, 99) * 1000,
+        "borrow_return_cycles_per_s": len(write_times) / args.duration,
+        "write_p95_ms": percentile(write_times, 95) * 1000,
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=32)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(asyncio.run(drive(args))))
+        return
+
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    forwarded = ["--duration", str(args.duration), "--readers", str(args.readers), "--writers", str(args.writers)]
+    for mode in args.modes:
+        env = {**os.environ, **MODES[mode], "PYTHONPATH": server_dir}
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.mixed_load", "--worker", *forwarded],
+            env=env, cwd=server_dir, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:>26}: " + ", ".join(f"{key}={value:.1f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
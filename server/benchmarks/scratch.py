@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+
+def use_scratch_database() -> str:
+    """Point the app at a new SQLite file in a temporary directory.
+
+    Call before anything imports `app`: settings are read once, and
+    DATABASE_URL from the environment or server/.env would otherwise win.
+    Returns the directory, which also becomes the working directory.
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "library.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    os.chdir(directory)
+    return directory
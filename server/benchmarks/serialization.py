@@ -0,0 +1,122 @@
+"""Per-row cost of turning a page of query results into a JSON response body.
+
+Compares, for books, users and borrow records with their book, the way list
+endpoints used to answer (ORM objects validated through the response model by
+FastAPI, then encoded with the stdlib json module) against the current path
+(selected columns turned into dicts by row_dicts and encoded with orjson).
+Fetch and serialization are timed separately on a scratch SQLite database.
+
+    python -m benchmarks.serialization --rows 500 --repeat 50
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from .scratch import use_scratch_database
+
+
+async def measure(args):
+    use_scratch_database()
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from sqlalchemy import insert, select
+    from sqlalchemy.orm import joinedload
+
+    from app.api.pagination import row_dicts, schema_columns
+    from app.db.database import SessionLocal, engine
+    from app.db.migrations import run_migrations
+    from app.db.models import Book, BorrowRecord, User
+    from app.schemas.book import Book as BookSchema
+    from app.schemas.borrow import BorrowRecord as BorrowRecordSchema, BorrowRecordDetail
+    from app.schemas.user import User as UserSchema
+
+    run_migrations()
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Book), [
+            {"title": f"Book {i}", "author": f"Author {i % 97}", "genre": "Fiction",
+             "available_copies": 2, "total_copies": 3}
+            for i in range(args.rows)
+        ])
+        conn.execute(insert(User), [
+            {"username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x",
+             "is_active": True, "is_admin": False}
+            for i in range(args.rows)
+        ])
+        conn.execute(insert(BorrowRecord), [
+            {"user_id": i + 1, "book_id": i + 1, "borrow_date": now, "due_date": now + timedelta(days=14),
+             "is_returned": False, "is_overdue": False}
+            for i in range(args.rows)
+        ])
+
+    cases = {
+        "books": (
+            select(Book).order_by(Book.id),
+            select(*schema_columns(Book, BookSchema)).order_by(Book.id),
+            BookSchema,
+        ),
+        "users": (
+            select(User).order_by(User.id),
+            select(*schema_columns(User, UserSchema)).order_by(User.id),
+            UserSchema,
+        ),
+        "borrows": (
+            select(BorrowRecord).options(joinedload(BorrowRecord.book)).order_by(BorrowRecord.id),
+            select(
+                *schema_columns(BorrowRecord, BorrowRecordSchema), *schema_columns(Book, BookSchema, "book")
+            ).join(BorrowRecord.book).order_by(BorrowRecord.id),
+            BorrowRecordDetail,
+        ),
+    }
+
+    results = {}
+    for name, (orm_query, row_query, schema) in cases.items():
+        field = create_response_field(name="Response", type_=List[schema], mode="serialization")
+        fetch = {"response_model": 0.0, "row_dicts": 0.0}
+        encode = {"response_model": 0.0, "row_dicts": 0.0}
+        for _ in range(args.repeat):
+            with SessionLocal() as db:
+                started = time.perf_counter()
+                items = db.scalars(orm_query).unique().all()
+                fetched = time.perf_counter()
+                content = await serialize_response(field=field, response_content=items)
+                body = JSONResponse(content).body
+                fetch["response_model"] += fetched - started
+                encode["response_model"] += time.perf_counter() - fetched
+
+            with SessionLocal() as db:
+                started = time.perf_counter()
+                rows = db.execute(row_query).all()
+                fetched = time.perf_counter()
+                fast_body = ORJSONResponse(row_dicts(rows, rows[0]._fields)).body
+                fetch["row_dicts"] += fetched - started
+                encode["row_dicts"] += time.perf_counter() - fetched
+            assert len(fast_body) == len(body), "both paths should produce the same JSON"
+
+        per_row = 1e6 / (args.repeat * args.rows)
+        results[name] = {
+            path: (fetch[path] * per_row, encode[path] * per_row) for path in fetch
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(measure(args))
+    print(f"{'':>8} {'path':>15} {'fetch us/row':>13} {'encode us/row':>14} {'total us/row':>13}")
+    for name, paths in results.items():
+        for path, (fetch, encode) in paths.items():
+            print(f"{name:>8} {path:>15} {fetch:>13.2f} {encode:>14.2f} {fetch + encode:>13.2f}")
+        slow, fast = (sum(paths[path]) for path in ("response_model", "row_dicts"))
+        print(f"{name:>8} {'speedup':>15} {slow / fast:>42.1f}x")
+
+
+if __name__ == "__main__":
+    main()
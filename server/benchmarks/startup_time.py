@@ -0,0 +1,120 @@
+"""Worker cold start: time from process launch to the first served request.
+
+Starts `--runs` fresh uvicorn workers one after another on a scratch,
+migrated SQLite database with STARTUP_TIMING on, polls GET / until it
+answers, and reports the median of each boot milestone the worker logs
+(app imported, startup finished, first request served) alongside the
+launch-to-first-response time seen by the client. `--importtime` also lists
+the slowest imports of app.main from `python -X importtime`.
+
+    python -m benchmarks.startup_time --runs 5 --importtime --output startup.json
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+MILESTONE = re.compile(r"Boot timing: (\w+) after ([\d.]+) ms")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def boot_once(env, cwd, timeout):
+    port = free_port()
+    launched = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    # One client for every poll: building one per attempt would compete with
+    # the booting worker for CPU
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while True:
+                if worker.poll() is not None or time.perf_counter() - launched > timeout:
+                    raise SystemExit(f"Worker did not come up:\n{worker.communicate()[1]}")
+                try:
+                    client.get("/").raise_for_status()
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+        first_response = time.perf_counter() - launched
+        # Let the worker log its first-request milestone before stopping it
+        time.sleep(0.2)
+    finally:
+        worker.terminate()
+    log = worker.communicate()[1]
+    timings = {name: float(ms) for name, ms in MILESTONE.findall(log)}
+    timings["launch_to_first_response"] = first_response * 1000
+    return timings
+
+
+def slowest_imports(env, cwd, count):
+    """Modules imported directly by app.main, by largest cumulative time"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, cwd=cwd, capture_output=True, text=True, check=True,
+    ).stderr
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Each level of nesting adds two spaces; app.main itself has one
+        depth = len(name) - len(name.lstrip())
+        if cumulative.strip().isdigit() and depth == 3:
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for each worker")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports")
+    parser.add_argument("--output", help="Write the medians to this JSON file")
+    args = parser.parse_args(argv)
+
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    scratch = tempfile.mkdtemp()
+    database = os.path.join(scratch, "library.db")
+    env = {
+        **os.environ, "PYTHONPATH": server_dir, "STARTUP_TIMING": "true",
+        "DATABASE_URL": f"sqlite:///{database}", "ASYNC_DATABASE_URL": f"sqlite+aiosqlite:///{database}",
+    }
+    subprocess.run(
+        [sys.executable, "-m", "app.cli", "migrate"], env=env, cwd=scratch, capture_output=True, check=True
+    )
+
+    runs = [boot_once(env, scratch, args.timeout) for _ in range(args.runs)]
+    medians = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    for name, ms in medians.items():
+        print(f"{name:>26}: {ms:8.1f} ms (median of {len(runs)})")
+
+    imports = []
+    if args.importtime:
+        imports = slowest_imports(env, scratch, 15)
+        print("\nslowest imports of app.main (cumulative):")
+        for ms, name in imports:
+            print(f"{ms:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"medians_ms": medians, "runs_ms": runs, "imports_ms": dict((n, ms) for ms, n in imports)},
+                      f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Fixtures shared by the test suite.
+
+Every test runs the app in-process against one scratch SQLite database,
+migrated once per session and emptied after each test. Foreign keys are
+enforced, as they are on PostgreSQL.
+"""
+import os
+import tempfile
+from collections import namedtuple
+
+# Settings are read when `app` is first imported, so the scratch database
+# has to be in the environment before that
+_database = os.path.join(tempfile.mkdtemp(), "library.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database}"
+os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{_database}"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, insert
+
+from app.core.security import create_access_token, principal_cache
+from app.db.catalog import catalog_cache
+from app.db.database import Base, SessionLocal, async_engine, engine
+from app.db.migrations import run_migrations
+from app.db.models import Book, CatalogState, User
+from app.main import app
+
+Patron = namedtuple("Patron", "id username headers")
+
+
+def enforce_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    run_migrations()
+    # Connections opened from here on enforce foreign keys
+    for pool_owner in (engine, async_engine.sync_engine):
+        pool_owner.dispose()
+        event.listen(pool_owner, "connect", enforce_foreign_keys)
+    yield engine
+
+
+@pytest.fixture(autouse=True)
+def clean_database(database):
+    yield
+    with database.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not CatalogState.__table__:
+                conn.execute(delete(table))
+    principal_cache.clear()
+    catalog_cache.clear()
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(database):
+    """Insert a user and return its id, username and bearer token headers"""
+    def make(username, is_admin=False):
+        with database.begin() as conn:
+            user_id = conn.execute(insert(User).returning(User.id), {
+                "username": username, "email": f"{username}@example.com",
+                "hashed_password": "x", "is_active": True, "is_admin": is_admin,
+            }).scalar_one()
+        token = create_access_token({"sub": username})
+        return Patron(user_id, username, {"Authorization": f"Bearer {token}"})
+    return make
+
+
+@pytest.fixture
+def make_books(database):
+    """Insert `count` books, `values` overriding the defaults; returns their ids"""
+    def make(count, **values):
+        with database.begin() as conn:
+            return list(conn.execute(insert(Book).returning(Book.id, sort_by_parameter_order=True), [
+                {"title": f"Book {i}", "author": "Author", "genre": "Fiction",
+                 "available_copies": 1, "total_copies": 1, "loan_period_days": None, **values}
+                for i in range(count)
+            ]).scalars())
+    return make
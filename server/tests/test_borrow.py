@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func, insert, select
+
+from app.api.endpoints.borrow import borrow_book
+from app.db.database import SessionLocal
+from app.db.models import Book, BorrowRecord
+
+
+def test_concurrent_borrows_never_oversell(database, make_user, make_books):
+    """Parallel borrows of one book lend each copy exactly once"""
+    copies, patrons = 20, 80
+    [book_id] = make_books(1, available_copies=copies, total_copies=copies)
+    users = [make_user(f"patron{i}") for i in range(patrons)]
+
+    def attempt(user):
+        with SessionLocal() as db:
+            try:
+                borrow_book(book_id, db=db, current_user=user)
+                return "ok"
+            except HTTPException as exc:
+                return exc.detail
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        outcomes = list(pool.map(attempt, users))
+
+    with database.connect() as conn:
+        remaining = conn.scalar(select(Book.available_copies).where(Book.id == book_id))
+        active = conn.scalar(select(func.count()).select_from(BorrowRecord).where(BorrowRecord.is_returned == False))
+    assert outcomes.count("ok") == active == copies
+    assert remaining == 0
+
+
+@pytest.fixture
+def rival_loan(database):
+    """Commit an active loan from another connection just before the borrow takes
+    a copy, as a concurrent request that also passed the duplicate check would"""
+    pending = []
+
+    def before_execute(conn, cursor, statement, *args):
+        if pending and statement.startswith("UPDATE books"):
+            loan = pending.pop()
+            with database.begin() as other:
+                other.execute(insert(BorrowRecord), {
+                    **loan, "borrow_date": datetime.utcnow(), "due_date": datetime.utcnow(), "is_returned": False
+                })
+
+    event.listen(database, "before_cursor_execute", before_execute)
+    yield lambda user_id, book_id: pending.append({"user_id": user_id, "book_id": book_id})
+    event.remove(database, "before_cursor_execute", before_execute)
+
+
+def test_concurrent_duplicate_borrow_is_refused(client, database, make_user, make_books, rival_loan):
+    patron = make_user("patron")
+    [book_id] = make_books(1, available_copies=2, total_copies=2)
+    rival_loan(patron.id, book_id)
+
+    response = client.post(f"/api/v1/borrow/borrow/{book_id}", headers=patron.headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "You already have a copy of this book borrowed"
+    with database.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(BorrowRecord)) == 1
+        assert conn.scalar(select(Book.available_copies).where(Book.id == book_id)) == 2
+
+
+def test_concurrent_duplicate_in_batch_fails_only_that_book(client, database, make_user, make_books, rival_loan):
+    patron = make_user("patron")
+    book_ids = make_books(2, available_copies=2, total_copies=2)
+    rival_loan(patron.id, book_ids[0])
+
+    response = client.post("/api/v1/borrow/borrow/batch", headers=patron.headers, json={"book_ids": book_ids})
+
+    assert response.status_code == 200, response.text
+    first, second = response.json()
+    assert first["error"] == "You already have a copy of this book borrowed"
+    assert second["record"]["book_id"] == book_ids[1]
+    with database.connect() as conn:
+        assert conn.execute(
+            select(Book.available_copies).where(Book.id.in_(book_ids)).order_by(Book.id)
+        ).scalars().all() == [2, 1]
@@ -0,0 +1,34 @@
+from sqlalchemy import event, select
+
+from app.db.models import CatalogState
+
+
+def test_catalog_version_is_bumped_after_the_write_commits(client, database, make_user, make_books):
+    """A borrow must not hold the catalog_state row lock for its whole transaction"""
+    patron = make_user("patron")
+    [book_id] = make_books(1)
+    with database.connect() as conn:
+        before = conn.scalar(select(CatalogState.version))
+
+    events = []
+
+    def record(conn, cursor, statement, *args):
+        events.append(statement.split()[:2])
+
+    def on_commit(conn):
+        events.append(["COMMIT"])
+
+    event.listen(database, "before_cursor_execute", record)
+    event.listen(database, "commit", on_commit)
+    try:
+        response = client.post(f"/api/v1/borrow/borrow/{book_id}", headers=patron.headers)
+    finally:
+        event.remove(database, "before_cursor_execute", record)
+        event.remove(database, "commit", on_commit)
+
+    assert response.status_code == 200, response.text
+    bump = events.index(["UPDATE", "catalog_state"])
+    assert ["INSERT", "INTO"] in events[:bump]
+    assert events.index(["COMMIT"]) < bump
+    with database.connect() as conn:
+        assert conn.scalar(select(CatalogState.version)) == before + 1
@@ -0,0 +1,84 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.db.models import HOLD_CANCELLED, HOLD_FULFILLED, HOLD_WAITING, Book, BorrowRecord, Hold
+
+
+def test_delete_book_with_holds_and_loans(client, database, make_user, make_books):
+    admin = make_user("admin", is_admin=True)
+    patrons = [make_user(f"patron{i}") for i in range(3)]
+    [book_id] = make_books(1)
+    now = datetime.utcnow()
+    with database.begin() as conn:
+        loan_id = conn.execute(insert(BorrowRecord).returning(BorrowRecord.id), {
+            "user_id": patrons[0].id, "book_id": book_id, "borrow_date": now - timedelta(days=10),
+            "due_date": now, "return_date": now, "is_returned": True,
+        }).scalar_one()
+        conn.execute(insert(Hold), [
+            {"user_id": patrons[0].id, "book_id": book_id, "status": HOLD_FULFILLED,
+             "fulfilled_at": now, "borrow_record_id": loan_id},
+            {"user_id": patrons[1].id, "book_id": book_id, "status": HOLD_CANCELLED,
+             "fulfilled_at": None, "borrow_record_id": None},
+            {"user_id": patrons[2].id, "book_id": book_id, "status": HOLD_WAITING,
+             "fulfilled_at": None, "borrow_record_id": None},
+        ])
+
+    response = client.delete(f"/api/v1/admin/books/{book_id}", headers=admin.headers)
+
+    assert response.status_code == 200, response.text
+    with database.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(Book)) == 0
+        assert conn.scalar(select(func.count()).select_from(Hold)) == 0
+
+
+def test_hold_list_shows_queue_positions(client, database, make_user, make_books):
+    patron, first, second = (make_user(name) for name in ("patron", "first", "second"))
+    book_ids = make_books(3, available_copies=0)
+    with database.begin() as conn:
+        conn.execute(insert(Hold), [
+            {"user_id": first.id, "book_id": book_ids[0], "status": HOLD_WAITING},
+            {"user_id": second.id, "book_id": book_ids[0], "status": HOLD_CANCELLED},
+            {"user_id": second.id, "book_id": book_ids[1], "status": HOLD_WAITING},
+            {"user_id": first.id, "book_id": book_ids[1], "status": HOLD_WAITING},
+            {"user_id": patron.id, "book_id": book_ids[0], "status": HOLD_WAITING},
+            {"user_id": patron.id, "book_id": book_ids[1], "status": HOLD_WAITING},
+            {"user_id": patron.id, "book_id": book_ids[2], "status": HOLD_WAITING},
+        ])
+
+    holds = client.get("/api/v1/holds/", headers=patron.headers).json()
+
+    assert {hold["book_id"]: hold["position"] for hold in holds} == {
+        book_ids[0]: 2, book_ids[1]: 3, book_ids[2]: 1
+    }
+
+
+@pytest.mark.parametrize("via", ["update", "import"])
+def test_restocked_copies_go_to_the_hold_queue(via, client, database, make_user, make_books):
+    admin = make_user("admin", is_admin=True)
+    first, second = make_user("first"), make_user("second")
+    [book_id] = make_books(1, title="Restocked", available_copies=0, total_copies=1)
+    with database.begin() as conn:
+        conn.execute(insert(Hold), [
+            {"user_id": first.id, "book_id": book_id, "status": HOLD_WAITING},
+            {"user_id": second.id, "book_id": book_id, "status": HOLD_WAITING},
+        ])
+
+    book = {"title": "Restocked", "author": "Author", "genre": "Fiction",
+            "available_copies": 3, "total_copies": 4}
+    if via == "update":
+        response = client.put(f"/api/v1/admin/books/{book_id}", headers=admin.headers, json=book)
+    else:
+        response = client.post("/api/v1/admin/books/import", headers=admin.headers,
+                               files={"file": ("books.jsonl", json.dumps(book))})
+
+    assert response.status_code == 200, response.text
+    with database.connect() as conn:
+        assert conn.scalar(select(Book.available_copies).where(Book.id == book_id)) == 1
+        assert conn.execute(
+            select(Hold.user_id).where(Hold.status == HOLD_FULFILLED, Hold.borrow_record_id.is_not(None))
+            .order_by(Hold.id)
+        ).scalars().all() == [first.id, second.id]
+        assert conn.scalar(select(func.count()).select_from(BorrowRecord)) == 2
@@ -0,0 +1,69 @@
+"""List endpoints must run a fixed number of SQL statements, whatever the page holds.
+
+The count comes from the Server-Timing header the metrics middleware adds.
+"""
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.db.models import HOLD_WAITING, BorrowRecord, Hold
+
+STATEMENTS = re.compile(r'db;desc="(\d+) statements"')
+
+BORROW_LISTS = {
+    "history": ("/api/v1/borrow/?limit=500", False),
+    "history fields": ("/api/v1/borrow/?limit=500&fields=id,book_id,due_date", False),
+    "admin borrows": ("/api/v1/admin/borrows?limit=500", True),
+    "admin overdue": ("/api/v1/admin/overdue?limit=500", True),
+}
+
+
+def count_statements(client, url, headers):
+    # The first request also loads the user; count a second one
+    client.get(url, headers=headers).raise_for_status()
+    response = client.get(url, headers=headers)
+    response.raise_for_status()
+    return int(STATEMENTS.search(response.headers["server-timing"]).group(1))
+
+
+@pytest.mark.parametrize("name", BORROW_LISTS)
+def test_borrow_lists_do_not_query_per_loan(name, client, database, make_user, make_books):
+    url, as_admin = BORROW_LISTS[name]
+    admin = make_user("admin", is_admin=True)
+    book_ids = make_books(100, total_copies=2)
+    now = datetime.utcnow()
+
+    counts = []
+    for size in (1, 10, 100):
+        patron = make_user(f"patron{size}")
+        with database.begin() as conn:
+            conn.execute(insert(BorrowRecord), [
+                {"user_id": patron.id, "book_id": book_id, "borrow_date": now - timedelta(days=20),
+                 "due_date": now - timedelta(days=6) if i % 2 else now + timedelta(days=8),
+                 "is_returned": i % 3 == 0}
+                for i, book_id in enumerate(book_ids[:size])
+            ])
+        counts.append(count_statements(client, url, (admin if as_admin else patron).headers))
+
+    assert len(set(counts)) == 1, f"statements for 1, 10 and 100 loans: {counts}"
+
+
+def test_hold_list_does_not_query_per_hold(client, database, make_user, make_books):
+    others = [make_user(f"other{i}") for i in range(3)]
+    book_ids = make_books(50, available_copies=0)
+    with database.begin() as conn:
+        # Someone is ahead in every queue, so positions are not all 1
+        conn.execute(insert(Hold), [{"user_id": others[i % 3].id, "book_id": book_id, "status": HOLD_WAITING}
+                                    for i, book_id in enumerate(book_ids)])
+
+    counts = []
+    for size in (1, 10, 40):
+        patron = make_user(f"patron{size}")
+        with database.begin() as conn:
+            conn.execute(insert(Hold), [{"user_id": patron.id, "book_id": book_id, "status": HOLD_WAITING}
+                                        for book_id in book_ids[:size]])
+        counts.append(count_statements(client, "/api/v1/holds/?limit=500", patron.headers))
+
+    assert len(set(counts)) == 1, f"statements for 1, 10 and 40 holds: {counts}"
@@ -0,0 +1,50 @@
+"""The hot borrow_records and holds queries must be served by indexes.
+
+EXPLAIN QUERY PLAN on the statements the endpoints issue may not scan a
+table without an index or sort in a temporary B-tree.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.api.endpoints.borrow import borrow_rows
+from app.api.pagination import PageParams, page_query
+from app.db.database import engine
+from app.db.models import HOLD_WAITING, BorrowRecord, Hold
+
+FIRST_PAGE = PageParams(after=None, limit=100, fields=None)
+HISTORY_KEYS = [(BorrowRecord.is_returned, False), (BorrowRecord.borrow_date, True), (BorrowRecord.id, True)]
+OVERDUE_KEYS = [(BorrowRecord.due_date, False), (BorrowRecord.user_id, False), (BorrowRecord.id, False)]
+OVERDUE = (BorrowRecord.is_returned == False, BorrowRecord.due_date < datetime(2026, 1, 1))
+
+QUERIES = {
+    "borrow.get_borrowed_books": lambda: page_query(
+        borrow_rows(FIRST_PAGE).where(BorrowRecord.user_id == 1), HISTORY_KEYS, FIRST_PAGE
+    ),
+    "borrow.borrow_book duplicate check": lambda: select(BorrowRecord.id).where(
+        BorrowRecord.user_id == 1, BorrowRecord.book_id == 1, BorrowRecord.is_returned == False
+    ),
+    "admin.delete_book active borrows": lambda: select(func.count()).select_from(BorrowRecord).where(
+        BorrowRecord.book_id == 1, BorrowRecord.is_returned == False
+    ),
+    "admin.get_overdue_borrows": lambda: page_query(
+        borrow_rows(FIRST_PAGE).where(*OVERDUE), OVERDUE_KEYS, FIRST_PAGE
+    ),
+    "admin.get_overdue_users counts": lambda: select(
+        BorrowRecord.user_id, func.count(), func.min(BorrowRecord.due_date)
+    ).where(*OVERDUE).group_by(BorrowRecord.user_id),
+    "holds.lend_to_next_in_queue head": lambda: select(Hold.id, Hold.user_id).where(
+        Hold.book_id == 1, Hold.status == HOLD_WAITING
+    ).order_by(Hold.id).limit(1),
+}
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_query_uses_an_index(name):
+    sql = str(QUERIES[name]().compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+    assert all("INDEX" in step or "SCAN" not in step for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan